@@ -1,5 +1,4 @@
 from http.server import BaseHTTPRequestHandler
-import json
 import sys
 import os
 
@@ -8,35 +7,56 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
 # Import project configurations
 from projects import get_projects, get_categories
+from utils.catalog import EncodedPayload
+from utils.settings import CATALOG_MAX_AGE
+
+def build_catalog() -> dict:
+    """Projects grouped by category, with totals"""
+    projects = get_projects()
+    categories = get_categories()
+    
+    # Group projects by category
+    projects_by_category = {}
+    for project_id, project in projects.items():
+        category = project['category']
+        if category not in projects_by_category:
+            projects_by_category[category] = {}
+        projects_by_category[category][project_id] = project
+    
+    return {
+        "categories": categories,
+        "projects": projects_by_category,
+        "total_projects": len(projects),
+        "total_categories": len(categories)
+    }
+
+# The catalog only changes on deploy, so it is grouped, serialized and
+# compressed once per instance, with an ETag from its content hash
+CATALOG = EncodedPayload(build_catalog())
+
+# Browsers revalidate after CATALOG_MAX_AGE; the CDN cache is purged on every
+# deploy, so it may keep the catalog for a day and serve it stale while refreshing
+CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE}, s-maxage=86400, stale-while-revalidate=86400"
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
+        status_code, body, headers = CATALOG.select(
+            self.headers.get('Accept-Encoding'),
+            self.headers.get('If-None-Match'),
+            CACHE_CONTROL
+        )
+        
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status_code != 304:
+            self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
         
-        projects = get_projects()
-        categories = get_categories()
-        
-        # Group projects by category
-        projects_by_category = {}
-        for project_id, project in projects.items():
-            category = project['category']
-            if category not in projects_by_category:
-                projects_by_category[category] = {}
-            projects_by_category[category][project_id] = project
-        
-        response = {
-            "categories": categories,
-            "projects": projects_by_category,
-            "total_projects": len(projects),
-            "total_categories": len(categories)
-        }
-        
-        self.wfile.write(json.dumps(response).encode())
+        self.wfile.write(body)
         return
 
     def do_OPTIONS(self):
@@ -45,4 +65,4 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
-        return 
\ No newline at end of file
+        return
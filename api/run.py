@@ -1,97 +1,246 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import socket
 import sys
 import os
-import importlib.util
-from urllib.parse import urlparse, parse_qs
+from typing import Any, Callable, Dict, Iterator
+from urllib.parse import urlparse
 
 # Add the backend directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
+# Only light modules are imported here; a project's own dependencies are
+# imported with its module on its first call
+from utils.loader import ProjectLoadError, module_cache
+from utils.registry import registry
+from utils.settings import RUN_MAX_BODY_BYTES, RUN_READ_TIMEOUT
+from utils.validation import ParameterError, ParameterValidators
+
+# The same parameter models the FastAPI app checks requests against
+validators = ParameterValidators()
+
+# Project functions resolved by earlier invocations; module state survives
+# between requests on a warm instance, and deployed files never change
+functions: Dict[str, Callable] = {}
+
+def get_function(project_id: str) -> Callable:
+    """The project's function, importing its module on first use"""
+    func = functions.get(project_id)
+    if func is None:
+        project_config = registry.get(project_id)
+        if project_config is None:
+            raise KeyError(project_id)
+        func = module_cache.get_function(
+            project_config["module"], registry.module_path(project_id), project_config["function"]
+        )
+        functions[project_id] = func
+    return func
+
+# Request bodies are read, and large responses written, in pieces of this size
+CHUNK_SIZE = 64 * 1024
+
+# Longest chunk-size or trailer line accepted in a chunked request body
+MAX_LINE = 1024
+
+ENCODER = json.JSONEncoder(default=str, separators=(',', ':'))
+
+class RequestError(Exception):
+    """A request rejected before its project runs"""
+    
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+def encode(payload: Any) -> Iterator[bytes]:
+    """JSON for payload in pieces of about CHUNK_SIZE bytes, as it is encoded"""
+    buffer = bytearray()
+    for piece in ENCODER.iterencode(payload):
+        buffer += piece.encode('utf-8')
+        if len(buffer) >= CHUNK_SIZE:
+            yield buffer
+            buffer = bytearray()
+    if buffer:
+        yield buffer
+
 class handler(BaseHTTPRequestHandler):
+    # Every response carries Content-Length or is chunked, so connections can be reused
+    protocol_version = 'HTTP/1.1'
+    # Set on the socket: a client that stalls mid-request is dropped instead of holding the handler
+    timeout = RUN_READ_TIMEOUT
+    
     def do_POST(self):
-        # Parse the URL to get project_id
-        parsed_url = urlparse(self.path)
-        path_parts = parsed_url.path.strip('/').split('/')
+        try:
+            project_id = self.parse_project_id()
+            parameters = self.read_parameters()
+            
+            # Projects come from the shared registry in backend/utils/registry.py;
+            # parameters are checked against it before the module is imported
+            project_config = registry.get(project_id)
+            if project_config is None:
+                raise RequestError(404, "Project not found")
+            try:
+                parameters = validators.validate(project_id, project_config, parameters)
+            except ParameterError as e:
+                raise RequestError(422, str(e))
+            try:
+                func = get_function(project_id)
+            except ProjectLoadError as e:
+                raise RequestError(500, str(e))
+        except RequestError as e:
+            self.send_json(e.status_code, {"success": False, "error": e.message})
+            return
         
-        if len(path_parts) < 2:
-            self.send_error(400, "Invalid request path")
+        # Nothing is sent until the call has finished, so the status reflects its outcome
+        try:
+            result = func(**parameters)
+        except Exception as e:
+            self.send_json(500, {"success": False, "error": str(e)})
             return
-            
-        project_id = path_parts[0]
         
-        # Set CORS headers
+        self.send_json(200, {
+            "success": True,
+            "result": result,
+            "job_id": f"vercel_{project_id}_001"
+        })
+
+    def do_OPTIONS(self):
         self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
+        self.send_cors_headers()
         self.end_headers()
+        return
+
+    def parse_project_id(self) -> str:
+        parsed_url = urlparse(self.path)
+        path_parts = parsed_url.path.strip('/').split('/')
         
+        if len(path_parts) < 2:
+            # The body is left unread, so the connection cannot carry another request
+            self.close_connection = True
+            raise RequestError(400, "Invalid request path")
+        return path_parts[0]
+
+    def read_parameters(self) -> Dict[str, Any]:
+        """The "parameters" object of the JSON request body"""
         try:
-            # Get request body
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
-            
-            parameters = data.get('parameters', {})
-            
-            # Project configurations
-            PROJECTS_CONFIG = {
-                "calculator": {"module": "calculator", "function": "calculate"},
-                "password_generator": {"module": "password_generator", "function": "generate_password"},
-                "qr_generator": {"module": "qr_generator", "function": "generate_qr"},
-                "web_link_extractor": {"module": "web_link_extractor", "function": "extract_links"}
-            }
-            
-            if project_id not in PROJECTS_CONFIG:
-                self.send_error(404, "Project not found")
-                return
-                
-            project_config = PROJECTS_CONFIG[project_id]
-            module_name = project_config["module"]
-            function_name = project_config["function"]
-            
-            # Import the module dynamically
-            module_path = os.path.join(os.path.dirname(__file__), '..', 'backend', 'projects', f"{module_name}.py")
-            
-            if not os.path.exists(module_path):
-                self.send_error(500, f"Module {module_name} not found")
-                return
-                
-            spec = importlib.util.spec_from_file_location(module_name, module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # Get the function
-            if not hasattr(module, function_name):
-                self.send_error(500, f"Function {function_name} not found")
-                return
-                
-            func = getattr(module, function_name)
-            
-            # Call the function with parameters
-            result = func(**parameters)
-            
-            response = {
-                "success": True,
-                "result": result,
-                "job_id": f"vercel_{project_id}_001"
-            }
-            
-            self.wfile.write(json.dumps(response).encode())
+            body = self.read_body()
+        except RequestError:
+            self.close_connection = True
+            raise
+        except (socket.timeout, ConnectionError):
+            self.close_connection = True
+            raise RequestError(408, "Timed out reading the request body")
+        
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            raise RequestError(400, "Request body is not valid JSON")
+        parameters = data.get('parameters', {}) if isinstance(data, dict) else None
+        if not isinstance(parameters, dict):
+            raise RequestError(400, "parameters must be a JSON object")
+        return parameters
+
+    def read_body(self) -> bytes:
+        """The request body, read in pieces and never past RUN_MAX_BODY_BYTES"""
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            return self.read_chunked_body()
+        
+        content_length = self.headers.get('Content-Length')
+        if content_length is None:
+            raise RequestError(411, "Content-Length required")
+        try:
+            remaining = int(content_length)
+        except ValueError:
+            raise RequestError(400, "Invalid Content-Length")
+        if remaining < 0:
+            raise RequestError(400, "Invalid Content-Length")
+        if remaining > RUN_MAX_BODY_BYTES:
+            raise RequestError(413, f"Request body exceeds {RUN_MAX_BODY_BYTES} bytes")
+        
+        body = bytearray()
+        while remaining:
+            piece = self.rfile.read(min(remaining, CHUNK_SIZE))
+            if not piece:
+                raise RequestError(400, "Request body is shorter than Content-Length")
+            body += piece
+            remaining -= len(piece)
+        return bytes(body)
+
+    def read_chunked_body(self) -> bytes:
+        body = bytearray()
+        while True:
+            line = self.rfile.readline(MAX_LINE + 1)
+            if len(line) > MAX_LINE or not line.endswith(b'\n'):
+                raise RequestError(400, "Malformed chunked request body")
+            try:
+                size = int(line.split(b';', 1)[0].strip(), 16)
+            except ValueError:
+                raise RequestError(400, "Malformed chunked request body")
+            if size < 0:
+                raise RequestError(400, "Malformed chunked request body")
+            if size == 0:
+                break
+            if len(body) + size > RUN_MAX_BODY_BYTES:
+                raise RequestError(413, f"Request body exceeds {RUN_MAX_BODY_BYTES} bytes")
             
-        except Exception as e:
-            error_response = {
-                "success": False,
-                "error": str(e)
-            }
-            self.wfile.write(json.dumps(error_response).encode())
+            while size:
+                piece = self.rfile.read(min(size, CHUNK_SIZE))
+                if not piece:
+                    raise RequestError(400, "Request body ended mid-chunk")
+                body += piece
+                size -= len(piece)
+            if self.rfile.readline(MAX_LINE + 1).strip():
+                raise RequestError(400, "Malformed chunked request body")
+        
+        # Trailers are read and ignored up to the blank line ending the body
+        for _ in range(100):
+            line = self.rfile.readline(MAX_LINE + 1)
+            if not line.strip():
+                return bytes(body)
+        raise RequestError(400, "Too many trailers in chunked request body")
 
-    def do_OPTIONS(self):
-        self.send_response(200)
+    def send_json(self, status_code: int, payload: Dict[str, Any]):
+        """Send payload with Content-Length if it fits one chunk, else chunked as it is encoded"""
+        pieces = encode(payload)
+        try:
+            first = next(pieces, b'')
+            second = next(pieces, None)
+        except ValueError as e:
+            # Circular results fail before anything is sent, so they still get a proper error
+            pieces = encode({"success": False, "error": f"Result is not serializable: {e}"})
+            status_code, first, second = 500, next(pieces), None
+
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_cors_headers()
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        if second is None:
+            self.send_header('Content-Length', str(len(first)))
+            self.end_headers()
+            self.wfile.write(first)
+            return
+        
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            self.write_chunk(first)
+            self.write_chunk(second)
+            for piece in pieces:
+                self.write_chunk(piece)
+        except Exception:
+            # Headers are out; leaving the body unterminated tells the client it is incomplete
+            self.close_connection = True
+            raise
+        self.wfile.write(b'0\r\n\r\n')
+
+    def write_chunk(self, data: bytes):
+        self.wfile.write(b'%x\r\n' % len(data))
+        self.wfile.write(data)
+        self.wfile.write(b'\r\n')
+
+    def send_cors_headers(self):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        return 
\ No newline at end of file
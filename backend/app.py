@@ -1,19 +1,47 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 from typing import Dict, Any, List, Optional
+from contextlib import AsyncExitStack
 import asyncio
-import json
-import importlib.util
 import os
 import sys
-from pathlib import Path
-import traceback
+import time
 from datetime import datetime
 import uuid
 
+from utils.admission import AdmissionController, AdmissionRejected
+from utils.artifacts import artifact_ids, artifact_response, artifact_store
+from utils.cache import MISSING, ResultCache, cache_key
+from utils.catalog import PayloadCache
+from utils.compression import CompressionMiddleware
+from utils.executor import ProjectExecutor
+from utils.loader import ProjectLoadError, module_cache
+from utils.job_store import DuplicateIdempotencyKey, create_job_store
+from utils.jobs import JobQueue, JobQueueFull
+from utils.settings import (
+    ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT, BATCH_MAX_ITEMS, CANCEL_GRACE_SECONDS,
+    CANCEL_POLL_SECONDS,
+    CATALOG_MAX_AGE, CLIENT_BURST, CLIENT_CONCURRENCY, CLIENT_RATE, COMPRESS_LEVEL,
+    COMPRESS_MIN_SIZE, DEFAULT_EXECUTION, DEFAULT_TIMEOUT, EXECUTION_LIMITS, JOB_DB_PATH,
+    JOB_MAX_BYTES, JOB_MAX_ENTRIES, JOB_QUEUE_SIZE, JOB_STORE, JOB_TTL_SECONDS, JOB_WORKERS,
+    MAX_TIMEOUT, PIPELINE_MAX_CONCURRENCY, PIPELINE_MAX_ITEMS, PIPELINE_MAX_STEPS, PROJECTS_DIR,
+    RESULT_CACHE_DIR, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, SCHEDULER_ENABLED, SCHEDULES_PATH,
+    SCHEDULE_HISTORY, SCHEDULE_MAX, SCHEDULE_MISFIRE_GRACE, TRUST_PROXY_HEADERS,
+    WORKER_CPU_LIMIT_SECONDS, WORKER_MAX_JOBS, WORKER_MAX_RSS_MB, WORKER_MEMORY_LIMIT_MB
+)
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from utils.pipeline import Pipeline, PipelineError, check_spec
+from utils.registry import registry
+from utils.scheduler import ScheduleError, Scheduler
+from utils.serialization import dumps
+from utils.singleflight import SingleFlight
+from utils.validation import ParameterError, ParameterValidators
+
 # Add the projects directory to the Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'projects'))
+sys.path.append(PROJECTS_DIR)
 
 app = FastAPI(title="Python Mini Projects API", version="1.0.0")
 
@@ -26,138 +54,195 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store for active jobs
-active_jobs: Dict[str, Dict] = {}
+# Compress large complete responses; streams and the pre-encoded catalog pass through
+if COMPRESS_MIN_SIZE > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_SIZE, gzip_level=COMPRESS_LEVEL)
+
+# Store for jobs, bounded by TTL, entry count and byte budget
+job_store = create_job_store(JOB_STORE, JOB_DB_PATH, JOB_TTL_SECONDS, JOB_MAX_ENTRIES, JOB_MAX_BYTES)
+
+# Thread/process pools that run project functions off the event loop
+executor = ProjectExecutor(EXECUTION_LIMITS, {
+    "max_jobs": WORKER_MAX_JOBS,
+    "max_rss": WORKER_MAX_RSS_MB * 1024 * 1024,
+    "memory_limit": WORKER_MEMORY_LIMIT_MB * 1024 * 1024,
+    "cpu_limit": WORKER_CPU_LIMIT_SECONDS,
+})
+
+# Bounded worker queue for ?async=true runs
+job_queue = JobQueue(JOB_WORKERS, JOB_QUEUE_SIZE)
+
+# Tasks of jobs running in this process, so DELETE /jobs/{job_id} can cancel them
+running_jobs: Dict[str, asyncio.Task] = {}
+
+# Cancels jobs running here that a DELETE through another worker removed
+deleted_jobs_watcher: Optional[asyncio.Task] = None
+
+# Results of projects marked cacheable, keyed by project and parameters
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_DIR or None, RESULT_CACHE_TTL)
+
+# Identical project runs that are in flight at the same time share one execution
+in_flight = SingleFlight()
+
+# Parameter models compiled from each project's parameter specs
+validators = ParameterValidators()
+
+# Encoded /projects catalog, rebuilt when the registry version changes
+catalog = PayloadCache()
+
+# Rate and concurrency limits per project and per client IP for the run endpoints
+admission = AdmissionController(
+    CLIENT_RATE, CLIENT_BURST, CLIENT_CONCURRENCY, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT
+)
+
+# Recurring runs, queued as jobs from a single timer
+scheduler = Scheduler(
+    lambda schedule: submit_scheduled_run(schedule),
+    SCHEDULES_PATH, SCHEDULE_HISTORY, SCHEDULE_MISFIRE_GRACE, SCHEDULE_MAX
+)
+
+# Metrics exposed on /metrics
+metrics = MetricsRegistry()
+project_stage_seconds = metrics.histogram(
+    "toolkit_project_stage_seconds", "Time spent per project and stage", ("project", "stage")
+)
+project_runs_total = metrics.counter(
+    "toolkit_project_runs_total", "Finished project runs by outcome", ("project", "status")
+)
+project_errors_total = metrics.counter(
+    "toolkit_project_errors_total", "Project errors by stage", ("project", "stage")
+)
+projects_in_flight = metrics.gauge(
+    "toolkit_projects_in_flight", "Project functions currently executing", ("project",)
+)
+result_cache_lookups_total = metrics.counter(
+    "toolkit_result_cache_lookups_total", "Result cache lookups by outcome", ("project", "outcome")
+)
+single_flight_coalesced_total = metrics.counter(
+    "toolkit_single_flight_coalesced_total", "Runs that joined an identical in-flight run", ("project",)
+)
+module_load_seconds = metrics.histogram(
+    "toolkit_module_load_seconds", "Time spent executing project modules", ("module",)
+)
+job_queue_depth = metrics.gauge("toolkit_job_queue_depth", "Async jobs waiting for a worker")
+admission_queue_depth = metrics.gauge(
+    "toolkit_admission_queue_depth", "Runs waiting for a concurrency slot", ("project",)
+)
+admission_rejections_total = metrics.counter(
+    "toolkit_admission_rejections_total", "Runs rejected with 429 by reason", ("project", "reason")
+)
+worker_recycles_total = metrics.counter(
+    "toolkit_worker_recycles_total", "cpu worker processes replaced by reason", ("reason",)
+)
+scheduled_runs_total = metrics.counter(
+    "toolkit_scheduled_runs_total", "Scheduled runs by outcome", ("project", "outcome")
+)
+
+# Module loads in this process; process pool workers keep their own counts
+module_cache.on_load = lambda module_name, seconds: module_load_seconds.observe(seconds, module_name)
+admission.on_queue = lambda project_id, depth: admission_queue_depth.set(depth, project_id)
+admission.on_reject = lambda project_id, reason: admission_rejections_total.inc(project_id, reason)
+executor.process_pool.on_recycle = lambda reason: worker_recycles_total.inc(reason)
+scheduler.on_fire = lambda project_id, outcome: scheduled_runs_total.inc(project_id, outcome)
+
+class ProjectTimeout(Exception):
+    """Raised when a project run exceeds its timeout."""
 
 class ProjectRequest(BaseModel):
     project_id: str
     parameters: Dict[str, Any] = {}
 
+class BatchRequest(BaseModel):
+    parameters: List[Dict[str, Any]]
+    stream: bool = False
+    timeout: Optional[float] = Field(None, gt=0, le=MAX_TIMEOUT)
+
+class PipelineStep(BaseModel):
+    id: str
+    project_id: str
+    input: Optional[str] = None
+    parameters: Dict[str, Any] = {}
+    stream: bool = False
+    each: Optional[str] = None
+    where: Dict[str, Any] = {}
+    concurrency: int = 1
+
+class PipelineRequest(BaseModel):
+    steps: List[PipelineStep]
+    timeout: Optional[float] = Field(None, gt=0, le=MAX_TIMEOUT)
+
+class ScheduleRequest(BaseModel):
+    project_id: str
+    parameters: Dict[str, Any] = {}
+    cron: Optional[str] = None
+    interval: Optional[float] = Field(None, ge=1)
+    timezone: str = "UTC"
+    jitter: float = Field(0, ge=0)
+    missed: str = Field("run_once", pattern="^(run_once|skip)$")
+    timeout: Optional[float] = Field(None, gt=0, le=MAX_TIMEOUT)
+
 class ProjectResponse(BaseModel):
     success: bool
     result: Any = None
     error: str = None
     job_id: str = None
+    status: str = None
 
-# Sample projects configuration
-PROJECTS_CONFIG = {
-    "calculator": {
-        "name": "Calculator",
-        "description": "A simple calculator application",
-        "category": "Utility",
-        "parameters": [
-            {"name": "expression", "type": "string", "description": "Mathematical expression to evaluate"}
-        ],
-        "module": "calculator",
-        "function": "calculate"
-    },
-    "password_generator": {
-        "name": "Password Generator",
-        "description": "Generate secure random passwords",
-        "category": "Security",
-        "parameters": [
-            {"name": "length", "type": "number", "description": "Password length", "default": 12},
-            {"name": "include_symbols", "type": "boolean", "description": "Include symbols", "default": True}
-        ],
-        "module": "password_generator",
-        "function": "generate_password"
-    },
-    "qr_generator": {
-        "name": "QR Code Generator",
-        "description": "Generate QR codes from text",
-        "category": "Utility",
-        "parameters": [
-            {"name": "text", "type": "string", "description": "Text to encode in QR code"}
-        ],
-        "module": "qr_generator",
-        "function": "generate_qr"
-    },
-    "weather": {
-        "name": "Weather Checker",
-        "description": "Get current weather information",
-        "category": "API",
-        "parameters": [
-            {"name": "city", "type": "string", "description": "City name"}
-        ],
-        "module": "weather",
-        "function": "get_weather"
-    },
-    "text_to_speech": {
-        "name": "Text to Speech",
-        "description": "Convert text to speech",
-        "category": "Audio",
-        "parameters": [
-            {"name": "text", "type": "string", "description": "Text to convert to speech"}
-        ],
-        "module": "text_to_speech",
-        "function": "speak_text"
-    },
-    "image_converter": {
-        "name": "Image Converter",
-        "description": "Convert images between formats",
-        "category": "Image",
-        "parameters": [
-            {"name": "input_format", "type": "string", "description": "Input format (jpg, png, etc.)"},
-            {"name": "output_format", "type": "string", "description": "Output format (jpg, png, etc.)"}
-        ],
-        "module": "image_converter",
-        "function": "convert_image"
-    },
-    "url_shortener": {
-        "name": "URL Shortener",
-        "description": "Shorten long URLs",
-        "category": "Web",
-        "parameters": [
-            {"name": "url", "type": "string", "description": "URL to shorten"}
-        ],
-        "module": "url_shortener",
-        "function": "shorten_url"
-    },
-    "file_organizer": {
-        "name": "File Organizer",
-        "description": "Organize files by type",
-        "category": "Utility",
-        "parameters": [
-            {"name": "directory", "type": "string", "description": "Directory to organize"}
-        ],
-        "module": "file_organizer",
-        "function": "organize_files"
-    },
-    "web_link_extractor": {
-        "name": "Web Link Extractor",
-        "description": "Extract all links from any webpage with filtering options",
-        "category": "Web",
-        "parameters": [
-            {"name": "url", "type": "string", "description": "URL of the webpage to extract links from"},
-            {"name": "max_links", "type": "number", "description": "Maximum number of links to return", "default": 50},
-            {"name": "filter_internal", "type": "boolean", "description": "Only show internal links (same domain)", "default": False},
-            {"name": "filter_external", "type": "boolean", "description": "Only show external links (different domain)", "default": False},
-            {"name": "include_emails", "type": "boolean", "description": "Include email links (mailto:)", "default": True}
-        ],
-        "module": "web_link_extractor",
-        "function": "extract_links"
-    }
-}
+# Projects declared in backend/projects, scanned into a cached manifest;
+# modules are only imported on their first run
+PROJECTS_CONFIG = registry.projects
+
+@app.on_event("startup")
+async def start_workers():
+    global deleted_jobs_watcher
+    job_queue.start()
+    validators.compile(PROJECTS_CONFIG)
+    # Pre-start cpu workers with their project modules imported, so no run pays a cold start
+    executor.warm_up([
+        (config["module"], project_module_path(config))
+        for config in PROJECTS_CONFIG.values()
+        if config.get("execution", DEFAULT_EXECUTION) == "cpu"
+    ])
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+    # A memory job store is per process, so every DELETE reaches the job's owner
+    if JOB_STORE == "sqlite":
+        deleted_jobs_watcher = asyncio.ensure_future(watch_deleted_jobs())
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    if deleted_jobs_watcher is not None:
+        deleted_jobs_watcher.cancel()
+    await scheduler.stop()
+    await job_queue.stop()
+    executor.shutdown()
 
 @app.get("/")
 async def root():
     return {"message": "Python Mini Projects API", "version": "1.0.0"}
 
-@app.get("/projects")
-async def get_projects():
-    """Get all available projects"""
-    return {
+def catalog_response(http_request: Request) -> Response:
+    """The project catalog from pre-encoded bytes, honouring If-None-Match"""
+    payload = catalog.get(registry.version, lambda: {
         "projects": PROJECTS_CONFIG,
         "total": len(PROJECTS_CONFIG)
-    }
+    })
+    status_code, body, headers = payload.select(
+        http_request.headers.get("accept-encoding"),
+        http_request.headers.get("if-none-match"),
+        f"public, max-age={CATALOG_MAX_AGE}"
+    )
+    return Response(content=body, status_code=status_code, headers=headers)
+
+@app.get("/projects")
+async def get_projects(http_request: Request):
+    """Get all available projects"""
+    return catalog_response(http_request)
 
 @app.get("/api/projects")
-async def get_projects_api():
+async def get_projects_api(http_request: Request):
     """Get all available projects (API endpoint)"""
-    return {
-        "projects": PROJECTS_CONFIG,
-        "total": len(PROJECTS_CONFIG)
-    }
+    return catalog_response(http_request)
 
 @app.get("/projects/{project_id}")
 async def get_project(project_id: str):
@@ -175,134 +260,722 @@ async def get_project_api(project_id: str):
     
     return PROJECTS_CONFIG[project_id]
 
-@app.post("/projects/{project_id}/run")
-async def run_project(project_id: str, request: ProjectRequest, background_tasks: BackgroundTasks):
-    """Run a specific project"""
-    if project_id not in PROJECTS_CONFIG:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    project_config = PROJECTS_CONFIG[project_id]
+def project_module_path(project_config: Dict[str, Any]) -> str:
+    """Absolute path of a project's module file"""
+    return os.path.join(PROJECTS_DIR, f"{project_config['module']}.py")
+
+def validate_parameters(project_id: str, project_config: Dict[str, Any],
+                        parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Check parameters against the project's schema and apply its defaults"""
+    started = time.perf_counter()
+    try:
+        return validators.validate(project_id, project_config, parameters)
+    except ParameterError as e:
+        project_errors_total.inc(project_id, "validate")
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        project_stage_seconds.observe(time.perf_counter() - started, project_id, "validate")
+
+def create_job(project_id: str, status: str, idempotency_key: Optional[str] = None,
+               request_fingerprint: Optional[str] = None) -> str:
+    """Record a new job and return its id"""
     job_id = str(uuid.uuid4())
     
     # Store job info
-    active_jobs[job_id] = {
+    job_store.create(job_id, {
+        "job_id": job_id,
         "project_id": project_id,
-        "status": "running",
+        "status": status,
         "created_at": datetime.now().isoformat(),
+        "started_at": None,
+        "finished_at": None,
+        "duration_ms": None,
         "result": None,
-        "error": None
+        "error": None,
+        "idempotency_key": idempotency_key,
+        # Identifies the validated parameters a replayed Idempotency-Key must match
+        "request_fingerprint": request_fingerprint
+    })
+    return job_id
+
+def job_timings(started: float) -> Dict[str, Any]:
+    """Completion timestamp and duration for a job started at started"""
+    return {
+        "finished_at": datetime.now().isoformat(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3)
     }
+
+async def call_project(project_id: str, project_config: Dict[str, Any],
+                       parameters: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+    """Call a project function, sharing cached and in-flight results where allowed"""
+    if timeout is None:
+        timeout = project_config.get("timeout", DEFAULT_TIMEOUT)
     
-    try:
-        # Dynamically import and run the project
-        module_name = project_config["module"]
-        function_name = project_config["function"]
-        
-        # Import the module
-        module_path = os.path.join("projects", f"{module_name}.py")
-        if not os.path.exists(module_path):
-            raise HTTPException(status_code=500, detail=f"Module {module_name} not found")
-        
-        spec = importlib.util.spec_from_file_location(module_name, module_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        
-        # Get the function
-        if not hasattr(module, function_name):
-            raise HTTPException(status_code=500, detail=f"Function {function_name} not found in module")
-        
-        func = getattr(module, function_name)
-        
-        # Call the function with parameters
-        result = func(**request.parameters)
-        
-        # Update job status
-        active_jobs[job_id]["status"] = "completed"
-        active_jobs[job_id]["result"] = result
-        
-        return ProjectResponse(success=True, result=result, job_id=job_id)
+    cacheable = project_config.get("cacheable", False)
+    coalesce = project_config.get("coalesce", cacheable)
+    key = cache_key(project_id, parameters) if cacheable or coalesce else None
+    
+    if cacheable:
+        result = result_cache.get(key)
+        # A cached result is stale once an artifact it refers to was evicted
+        hit = result is not MISSING and all(artifact_store.exists(a) for a in artifact_ids(result))
+        result_cache_lookups_total.inc(project_id, "hit" if hit else "miss")
+        if hit:
+            return result
+    
+    async def run():
+        projects_in_flight.inc(project_id)
+        started = time.perf_counter()
+        try:
+            # Call the function on the executor for its execution class
+            result = await executor.run(
+                project_config.get("execution", DEFAULT_EXECUTION),
+                project_config["module"],
+                project_module_path(project_config),
+                project_config["function"],
+                parameters,
+                timeout
+            )
+        except asyncio.TimeoutError:
+            project_errors_total.inc(project_id, "timeout")
+            raise ProjectTimeout(f"Project timed out after {timeout:g}s")
+        except Exception as e:
+            project_errors_total.inc(project_id, "load" if isinstance(e, ProjectLoadError) else "execute")
+            raise
+        finally:
+            project_stage_seconds.observe(time.perf_counter() - started, project_id, "execute")
+            projects_in_flight.dec(project_id)
         
+        if cacheable:
+            result_cache.set(key, result)
+        return result
+    
+    # Identical concurrent calls share a single execution
+    if coalesce:
+        if key in in_flight:
+            single_flight_coalesced_total.inc(project_id)
+        return await in_flight.do(key, run)
+    return await run()
+
+async def run_job(job_id: str, project_id: str, project_config: Dict[str, Any],
+                  parameters: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+    """Execute a job's project function, keeping its status and timings current"""
+    job_store.update(job_id, status="running", started_at=datetime.now().isoformat())
+    started = time.perf_counter()
+    
+    try:
+        result = await call_project(project_id, project_config, parameters, timeout)
+    except asyncio.CancelledError:
+        job_store.update(job_id, status="cancelled", error="Job was cancelled", **job_timings(started))
+        project_runs_total.inc(project_id, "cancelled")
+        raise
     except Exception as e:
         # Update job status with error
-        active_jobs[job_id]["status"] = "failed"
-        active_jobs[job_id]["error"] = str(e)
-        
-        raise HTTPException(status_code=500, detail=str(e))
+        job_store.update(job_id, status="failed", error=str(e), **job_timings(started))
+        project_runs_total.inc(project_id, "failed")
+        raise
+    
+    # Update job status
+    job_store.update(job_id, status="completed", result=result, **job_timings(started))
+    project_runs_total.inc(project_id, "completed")
+    return result
 
-@app.post("/api/projects/{project_id}/run")
-async def run_project_api(project_id: str, request: ProjectRequest, background_tasks: BackgroundTasks):
-    """Run a specific project (API endpoint)"""
+def start_job(job_id: str, project_id: str, project_config: Dict[str, Any],
+              parameters: Dict[str, Any], timeout: Optional[float]) -> asyncio.Task:
+    """Run a job in its own task so it can be cancelled independently of its caller"""
+    task = asyncio.ensure_future(run_job(job_id, project_id, project_config, parameters, timeout))
+    running_jobs[job_id] = task
+    task.add_done_callback(lambda _: running_jobs.pop(job_id, None))
+    return task
+
+async def watch_deleted_jobs():
+    """Cancel jobs of this process whose record was deleted through another worker"""
+    while True:
+        await asyncio.sleep(CANCEL_POLL_SECONDS)
+        for job_id, task in list(running_jobs.items()):
+            if job_store.get(job_id) is None:
+                task.cancel()
+
+def queue_job(job_id: str, project_id: str, project_config: Dict[str, Any],
+              parameters: Dict[str, Any], timeout: Optional[float]):
+    """Hand a created job to the worker queue, deleting it if the queue is full"""
+    async def job():
+        # Skip jobs deleted while they were queued
+        if job_store.get(job_id) is None:
+            return
+        # Outcomes, including cancellation, are recorded on the job
+        task = start_job(job_id, project_id, project_config, parameters, timeout)
+        await asyncio.wait({task})
+    
+    try:
+        job_queue.submit(job)
+    except JobQueueFull:
+        job_store.delete(job_id)
+        raise
+
+def json_response(project_id: str, payload: ProjectResponse, status_code: int = 200) -> Response:
+    """Serialize a run response, recording how long it took"""
+    started = time.perf_counter()
+    try:
+        # The field values as they are; model_dump would copy the whole result first
+        body = dumps(payload.__dict__)
+    except Exception:
+        project_errors_total.inc(project_id, "serialize")
+        raise
+    finally:
+        project_stage_seconds.observe(time.perf_counter() - started, project_id, "serialize")
+    
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+def replay_job(project_id: str, fingerprint: str, job: Dict[str, Any]) -> Response:
+    """Answer a retried request with the job its Idempotency-Key created"""
+    if job["project_id"] != project_id:
+        raise HTTPException(status_code=409, detail="Idempotency-Key was used for a different project")
+    # Jobs recorded before fingerprints were stored have none to compare
+    if job.get("request_fingerprint") not in (None, fingerprint):
+        raise HTTPException(status_code=422, detail="Idempotency-Key was used with different parameters")
+    
+    if job["status"] == "completed":
+        return json_response(project_id, ProjectResponse(
+            success=True, result=job["result"], job_id=job["job_id"], status="completed"
+        ))
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    
+    # Still queued or running; the client polls /jobs/{job_id}
+    return json_response(project_id, ProjectResponse(
+        success=True, job_id=job["job_id"], status=job["status"]
+    ), status_code=202)
+
+def rejected(error: AdmissionRejected) -> HTTPException:
+    """The 429 response for a request over a rate or concurrency limit"""
+    return HTTPException(status_code=429, detail=str(error),
+                         headers={"Retry-After": error.retry_after_header})
+
+def client_address(http_request: Request) -> str:
+    """The client IP that admission limits are applied to"""
+    if TRUST_PROXY_HEADERS:
+        forwarded = http_request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return http_request.client.host if http_request.client else "unknown"
+
+async def execute_project(project_id: str, request: ProjectRequest, run_async: bool,
+                          idempotency_key: Optional[str] = None,
+                          timeout: Optional[float] = None,
+                          client: str = "unknown") -> Response:
+    """Run a project, or queue it and return its job id when run_async is set"""
     if project_id not in PROJECTS_CONFIG:
         raise HTTPException(status_code=404, detail="Project not found")
     
     project_config = PROJECTS_CONFIG[project_id]
-    job_id = str(uuid.uuid4())
+    # Rejected before anything is imported or dispatched
+    parameters = validate_parameters(project_id, project_config, request.parameters)
     
-    # Store job info
-    active_jobs[job_id] = {
-        "project_id": project_id,
-        "status": "running",
-        "created_at": datetime.now().isoformat(),
-        "result": None,
-        "error": None
-    }
+    # Retries carrying the same Idempotency-Key map to the original job, uncounted by admission
+    fingerprint = cache_key(project_id, parameters) if idempotency_key else None
+    if idempotency_key:
+        job = job_store.find_by_idempotency_key(idempotency_key)
+        if job is not None:
+            return replay_job(project_id, fingerprint, job)
     
-    try:
-        # Dynamically import and run the project
-        module_name = project_config["module"]
-        function_name = project_config["function"]
-        
-        # Import the module
-        module_path = os.path.join("projects", f"{module_name}.py")
-        if not os.path.exists(module_path):
-            raise HTTPException(status_code=500, detail=f"Module {module_name} not found")
+    async with AsyncExitStack() as stack:
+        # Async runs are paced by their bounded queue; sync runs also hold a slot
+        try:
+            if run_async:
+                admission.check_rate(project_id, project_config, client)
+            else:
+                await stack.enter_async_context(admission.admit(project_id, project_config, client))
+        except AdmissionRejected as e:
+            raise rejected(e)
         
-        spec = importlib.util.spec_from_file_location(module_name, module_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
+        try:
+            job_id = create_job(project_id, "queued" if run_async else "running", idempotency_key,
+                                fingerprint)
+        except DuplicateIdempotencyKey:
+            # Another worker created the job between the lookup and the insert
+            job = job_store.find_by_idempotency_key(idempotency_key)
+            if job is None:
+                raise HTTPException(status_code=409, detail="Idempotency-Key is in use")
+            return replay_job(project_id, fingerprint, job)
         
-        # Get the function
-        if not hasattr(module, function_name):
-            raise HTTPException(status_code=500, detail=f"Function {function_name} not found in module")
+        if run_async:
+            try:
+                queue_job(job_id, project_id, project_config, parameters, timeout)
+            except JobQueueFull as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            
+            return json_response(project_id, ProjectResponse(
+                success=True, job_id=job_id, status="queued"
+            ), status_code=202)
         
-        func = getattr(module, function_name)
+        task = start_job(job_id, project_id, project_config, parameters, timeout)
+        await asyncio.wait({task})
+        if task.cancelled():
+            raise HTTPException(status_code=409, detail="Job was cancelled")
+        if task.exception() is not None:
+            error = task.exception()
+            raise HTTPException(status_code=504 if isinstance(error, ProjectTimeout) else 500, detail=str(error))
+        result = task.result()
         
-        # Call the function with parameters
-        result = func(**request.parameters)
-        
-        # Update job status
-        active_jobs[job_id]["status"] = "completed"
-        active_jobs[job_id]["result"] = result
+        return json_response(project_id, ProjectResponse(
+            success=True, result=result, job_id=job_id, status="completed"
+        ))
+
+@app.post("/projects/{project_id}/run")
+async def run_project(project_id: str, request: ProjectRequest, http_request: Request,
+                      run_async: bool = Query(False, alias="async"),
+                      timeout: Optional[float] = Query(None, gt=0, le=MAX_TIMEOUT),
+                      idempotency_key: Optional[str] = Header(None)):
+    """Run a specific project"""
+    return await execute_project(project_id, request, run_async, idempotency_key, timeout,
+                                 client_address(http_request))
+
+@app.post("/api/projects/{project_id}/run")
+async def run_project_api(project_id: str, request: ProjectRequest, http_request: Request,
+                          run_async: bool = Query(False, alias="async"),
+                          timeout: Optional[float] = Query(None, gt=0, le=MAX_TIMEOUT),
+                          idempotency_key: Optional[str] = Header(None)):
+    """Run a specific project (API endpoint)"""
+    return await execute_project(project_id, request, run_async, idempotency_key, timeout,
+                                 client_address(http_request))
+
+async def run_batch_item(index: int, project_id: str, project_config: Dict[str, Any],
+                         parameters: Dict[str, Any], timeout: Optional[float],
+                         client: str) -> Dict[str, Any]:
+    """Run one batch item, capturing its error instead of raising"""
+    try:
+        # Items were charged to the rate limits together; each waits its turn for a slot
+        async with admission.slot(project_id, project_config, client, wait=True):
+            result = await call_project(project_id, project_config, parameters, timeout)
+    except Exception as e:
+        return {"index": index, "success": False, "result": None, "error": str(e)}
+    return {"index": index, "success": True, "result": result, "error": None}
+
+async def execute_batch(project_id: str, request: BatchRequest, client: str = "unknown"):
+    """Run a project on many parameter sets under its executor limits"""
+    if project_id not in PROJECTS_CONFIG:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if len(request.parameters) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    
+    project_config = PROJECTS_CONFIG[project_id]
+    # Validate every item before any of them runs
+    items = []
+    for index, parameters in enumerate(request.parameters):
+        try:
+            items.append(validate_parameters(project_id, project_config, parameters))
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"Item {index}: {e.detail}")
+    
+    try:
+        admission.check_rate(project_id, project_config, client, len(items))
+    except AdmissionRejected as e:
+        raise rejected(e)
+    
+    tasks = [
+        asyncio.ensure_future(run_batch_item(index, project_id, project_config, parameters,
+                                             request.timeout, client))
+        for index, parameters in enumerate(items)
+    ]
+    
+    if request.stream:
+        async def stream_results():
+            # One JSON object per line, in completion order
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    item = await next_done
+                    yield dumps(item) + b"\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
         
-        return ProjectResponse(success=True, result=result, job_id=job_id)
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+    
+    results = await asyncio.gather(*tasks)
+    return Response(content=dumps({
+        "success": True,
+        "results": results,
+        "count": len(results),
+        "failed": sum(1 for item in results if not item["success"])
+    }), media_type="application/json")
+
+@app.post("/projects/{project_id}/run_batch")
+async def run_project_batch(project_id: str, request: BatchRequest, http_request: Request):
+    """Run a project on a list of parameter sets"""
+    return await execute_batch(project_id, request, client_address(http_request))
+
+@app.post("/api/projects/{project_id}/run_batch")
+async def run_project_batch_api(project_id: str, request: BatchRequest, http_request: Request):
+    """Run a project on a list of parameter sets (API endpoint)"""
+    return await execute_batch(project_id, request, client_address(http_request))
+
+async def iterate_project(project_id: str, project_config: Dict[str, Any],
+                          parameters: Dict[str, Any], timeout: Optional[float] = None):
+    """Iterate a project's stream function under the same deadline as a run"""
+    if timeout is None:
+        timeout = project_config.get("timeout", DEFAULT_TIMEOUT)
+    
+    try:
+        async for item in executor.stream(
+            project_config.get("execution", DEFAULT_EXECUTION),
+            project_config["module"],
+            project_module_path(project_config),
+            project_config["stream_function"],
+            parameters,
+            timeout
+        ):
+            yield item
+    except asyncio.TimeoutError:
+        project_errors_total.inc(project_id, "timeout")
+        raise ProjectTimeout(f"Project timed out after {timeout:g}s")
+
+def encode_event(item: Any, sse: bool) -> bytes:
+    """Encode one streamed item as an NDJSON line or a Server-Sent Event"""
+    data = dumps(item)
+    if not sse:
+        return data + b"\n"
+    event = item.get("event", "message") if isinstance(item, dict) else "message"
+    return b"event: " + str(event).encode() + b"\ndata: " + data + b"\n\n"
+
+async def execute_stream(project_id: str, request: ProjectRequest, sse: bool,
+                         client: str = "unknown") -> StreamingResponse:
+    """Stream a project's partial results as they are produced"""
+    if project_id not in PROJECTS_CONFIG:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    project_config = PROJECTS_CONFIG[project_id]
+    stream_function = project_config.get("stream_function")
+    parameters = validate_parameters(project_id, project_config, request.parameters)
+    
+    # Admitted like a run, holding its slots until the stream ends
+    admitted = AsyncExitStack()
+    try:
+        await admitted.enter_async_context(admission.admit(project_id, project_config, client))
+    except AdmissionRejected as e:
+        raise rejected(e)
+    
+    async def items():
+        if stream_function is None:
+            # Projects without a generator produce a single result event
+            result = await call_project(project_id, project_config, parameters)
+            yield {"event": "result", "result": result}
+            return
         
+        async for item in iterate_project(project_id, project_config, parameters):
+            yield item
+    
+    async def body():
+        started = time.perf_counter()
+        try:
+            async for item in items():
+                yield encode_event(item, sse)
+        except Exception as e:
+            project_errors_total.inc(project_id, "stream")
+            yield encode_event({"event": "error", "error": str(e)}, sse)
+        finally:
+            project_stage_seconds.observe(time.perf_counter() - started, project_id, "stream")
+            await admitted.aclose()
+        yield encode_event({"event": "end"}, sse)
+    
+    # Also released after the response, as a client gone before the body starts never runs it
+    release = BackgroundTask(admitted.aclose)
+    if sse:
+        return StreamingResponse(
+            body(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            background=release
+        )
+    return StreamingResponse(body(), media_type="application/x-ndjson", background=release)
+
+def wants_sse(http_request: Request, stream_format: Optional[str]) -> bool:
+    """Whether the client asked for Server-Sent Events rather than NDJSON"""
+    if stream_format is not None:
+        return stream_format == "sse"
+    return "text/event-stream" in http_request.headers.get("accept", "")
+
+@app.post("/projects/{project_id}/stream")
+async def stream_project(project_id: str, request: ProjectRequest, http_request: Request,
+                         stream_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|sse)$")):
+    """Stream a project's results as NDJSON or Server-Sent Events"""
+    return await execute_stream(project_id, request, wants_sse(http_request, stream_format),
+                                client_address(http_request))
+
+@app.post("/api/projects/{project_id}/stream")
+async def stream_project_api(project_id: str, request: ProjectRequest, http_request: Request,
+                             stream_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|sse)$")):
+    """Stream a project's results as NDJSON or Server-Sent Events (API endpoint)"""
+    return await execute_stream(project_id, request, wants_sse(http_request, stream_format),
+                                client_address(http_request))
+
+async def run_pipeline_step(step: Dict[str, Any], parameters: Dict[str, Any],
+                            timeout: Optional[float]) -> Any:
+    """Run a pipeline step on one set of parameters"""
+    project_config = PROJECTS_CONFIG[step["project_id"]]
+    try:
+        parameters = validate_parameters(step["project_id"], project_config, parameters)
+    except HTTPException as e:
+        raise ValueError(e.detail)
+    # Only the project's slot: a client slot held by a streaming step would block the steps it feeds
+    async with admission.slot(step["project_id"], project_config, None, wait=True):
+        return await call_project(step["project_id"], project_config, parameters, timeout)
+
+async def stream_pipeline_step(step: Dict[str, Any], parameters: Dict[str, Any],
+                               timeout: Optional[float], hold_slot: bool):
+    """Iterate a streaming pipeline step on one set of parameters"""
+    project_config = PROJECTS_CONFIG[step["project_id"]]
+    try:
+        parameters = validate_parameters(step["project_id"], project_config, parameters)
+    except HTTPException as e:
+        raise ValueError(e.detail)
+    async with AsyncExitStack() as stack:
+        if hold_slot:
+            await stack.enter_async_context(admission.slot(step["project_id"], project_config, None, wait=True))
+        async for item in iterate_project(step["project_id"], project_config, parameters, timeout):
+            yield item
+
+async def run_pipeline_job(job_id: str, steps: List[Dict[str, Any]], timeout: Optional[float]):
+    """Run a pipeline as one job; its result holds step progress while it runs"""
+    job_store.update(job_id, status="running", started_at=datetime.now().isoformat())
+    started = time.perf_counter()
+    last_update = 0.0
+    
+    def on_progress(progress: Dict[str, Any]):
+        nonlocal last_update
+        # Throttled, as every item of every step reports progress
+        if time.monotonic() - last_update >= 0.5:
+            last_update = time.monotonic()
+            job_store.update(job_id, result=progress)
+    
+    # A stream holds its slot while feeding the steps after it, so it skips it when they share a project
+    projects = [step["project_id"] for step in steps]
+    pipeline = Pipeline(
+        steps,
+        lambda step, parameters: run_pipeline_step(step, parameters, timeout),
+        lambda step, parameters: stream_pipeline_step(step, parameters, timeout,
+                                                      projects.count(step["project_id"]) == 1),
+        PIPELINE_MAX_ITEMS,
+        on_progress
+    )
+    try:
+        result = await pipeline.run()
+    except asyncio.CancelledError:
+        job_store.update(job_id, status="cancelled", error="Job was cancelled",
+                         result=pipeline.progress(), **job_timings(started))
+        project_runs_total.inc("pipeline", "cancelled")
+        raise
     except Exception as e:
-        # Update job status with error
-        active_jobs[job_id]["status"] = "failed"
-        active_jobs[job_id]["error"] = str(e)
-        
-        raise HTTPException(status_code=500, detail=str(e))
+        job_store.update(job_id, status="failed", error=str(e), **job_timings(started))
+        project_runs_total.inc("pipeline", "failed")
+        raise
+    
+    # The pipeline fails when a step without input does, as nothing else ran
+    failed = [
+        f"Step {step['id']}: {'; '.join(result['steps'][step['id']]['errors'])}"
+        for step in steps
+        if step["input"] is None and result["steps"][step["id"]]["failed"]
+    ]
+    status = "failed" if failed else "completed"
+    job_store.update(job_id, status=status, result=result, error="; ".join(failed) or None,
+                     **job_timings(started))
+    project_runs_total.inc("pipeline", status)
+
+async def submit_pipeline(request: PipelineRequest, client: str) -> Response:
+    """Check a pipeline spec and queue it as a single job"""
+    steps = [step.model_dump() for step in request.steps]
+    try:
+        check_spec(steps, PROJECTS_CONFIG, PIPELINE_MAX_STEPS, PIPELINE_MAX_CONCURRENCY)
+    except PipelineError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    # Steps without input already have all their parameters
+    for step in steps:
+        if step["input"] is None:
+            try:
+                step["parameters"] = validate_parameters(
+                    step["project_id"], PROJECTS_CONFIG[step["project_id"]], step["parameters"]
+                )
+            except HTTPException as e:
+                raise HTTPException(status_code=e.status_code, detail=f"Step {step['id']}: {e.detail}")
+    
+    try:
+        admission.check_rate("pipeline", {}, client)
+        # Steps are charged once each, however many items they map over
+        for step in steps:
+            admission.check_rate(step["project_id"], PROJECTS_CONFIG[step["project_id"]], client)
+    except AdmissionRejected as e:
+        raise rejected(e)
+    
+    job_id = create_job("pipeline", "queued")
+    
+    async def job():
+        # Skip pipelines deleted while they were queued
+        if job_store.get(job_id) is None:
+            return
+        task = asyncio.ensure_future(run_pipeline_job(job_id, steps, request.timeout))
+        running_jobs[job_id] = task
+        task.add_done_callback(lambda _: running_jobs.pop(job_id, None))
+        await asyncio.wait({task})
+    
+    try:
+        job_queue.submit(job)
+    except JobQueueFull as e:
+        job_store.delete(job_id)
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return json_response("pipeline", ProjectResponse(success=True, job_id=job_id, status="queued"), status_code=202)
+
+@app.post("/pipelines")
+async def run_pipeline(request: PipelineRequest, http_request: Request):
+    """Run a DAG of project steps server-side as a single job"""
+    return await submit_pipeline(request, client_address(http_request))
+
+@app.post("/api/pipelines")
+async def run_pipeline_api(request: PipelineRequest, http_request: Request):
+    """Run a DAG of project steps server-side as a single job (API endpoint)"""
+    return await submit_pipeline(request, client_address(http_request))
+
+def serve_artifact(artifact_id: str, http_request: Request) -> Response:
+    """Stream an artifact, honouring conditional and Range requests"""
+    file = artifact_store.open(artifact_id)
+    if file is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    
+    return artifact_response(artifact_id, file, http_request.headers, http_request.method != "HEAD")
+
+@app.api_route("/artifacts/{artifact_id}", methods=["GET", "HEAD"])
+async def get_artifact(artifact_id: str, http_request: Request):
+    """Download a binary result written by a project"""
+    return serve_artifact(artifact_id, http_request)
+
+@app.api_route("/api/artifacts/{artifact_id}", methods=["GET", "HEAD"])
+async def get_artifact_api(artifact_id: str, http_request: Request):
+    """Download a binary result written by a project (API endpoint)"""
+    return serve_artifact(artifact_id, http_request)
+
+def submit_scheduled_run(schedule: Dict[str, Any]) -> str:
+    """Queue one run of a schedule as a job and return its id"""
+    project_config = PROJECTS_CONFIG.get(schedule["project_id"])
+    if project_config is None:
+        raise ValueError(f"Project {schedule['project_id']} not found")
+    
+    job_id = create_job(schedule["project_id"], "queued")
+    queue_job(job_id, schedule["project_id"], project_config, schedule["parameters"], schedule["timeout"])
+    return job_id
+
+def require_scheduler():
+    """Reject schedule changes in a worker that does not fire schedules"""
+    if not scheduler.running:
+        raise HTTPException(
+            status_code=503,
+            detail="Schedules are managed by the worker started with TOOLKIT_SCHEDULER=1"
+        )
+
+@app.post("/schedules", status_code=201)
+async def create_schedule(request: ScheduleRequest):
+    """Run a project on a cron expression or a fixed interval"""
+    # Accepted here, a schedule would never fire
+    require_scheduler()
+    if request.project_id not in PROJECTS_CONFIG:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    spec = request.model_dump()
+    spec["parameters"] = validate_parameters(
+        request.project_id, PROJECTS_CONFIG[request.project_id], request.parameters
+    )
+    try:
+        schedule = scheduler.add(spec)
+    except ScheduleError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    return scheduler.describe(schedule)
+
+@app.get("/schedules")
+async def list_schedules():
+    """List schedules"""
+    # Workers that do not run the scheduler show what the one that does has saved
+    scheduler.reload()
+    schedules = [scheduler.describe(schedule) for schedule in scheduler.list()]
+    return {"schedules": schedules, "count": len(schedules), "running": scheduler.running}
+
+@app.get("/schedules/{schedule_id}")
+async def get_schedule(schedule_id: str):
+    """Get a schedule and the outcome of its recent runs"""
+    scheduler.reload()
+    schedule = scheduler.get(schedule_id)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    
+    history = []
+    for entry in scheduler.history(schedule_id):
+        job = job_store.get(entry["job_id"]) if entry["job_id"] else None
+        history.append({**entry, "job_status": job["status"] if job else None})
+    return {**scheduler.describe(schedule), "history": history}
+
+@app.delete("/schedules/{schedule_id}")
+async def delete_schedule(schedule_id: str):
+    """Stop and delete a schedule; runs already queued carry on"""
+    require_scheduler()
+    if not scheduler.remove(schedule_id):
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    
+    return {"message": "Schedule deleted"}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics for project runs, caches and queues"""
+    job_queue_depth.set(job_queue.depth)
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get result cache and in-flight deduplication counters"""
+    return {**result_cache.stats(), "single_flight": in_flight.stats()}
 
 @app.get("/jobs/{job_id}")
 async def get_job_status(job_id: str):
     """Get job status"""
-    if job_id not in active_jobs:
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return active_jobs[job_id]
+    return Response(content=dumps(job), media_type="application/json")
 
 @app.get("/jobs")
-async def get_all_jobs():
-    """Get all jobs"""
-    return active_jobs
+async def get_all_jobs(status: Optional[str] = None, limit: int = Query(50, ge=1, le=500),
+                       cursor: Optional[str] = None):
+    """List jobs newest first, one page at a time"""
+    try:
+        jobs, next_cursor = job_store.list(status=status, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Results can be large; fetch them through /jobs/{job_id}
+    return {"jobs": jobs, "next_cursor": next_cursor}
 
 @app.delete("/jobs/{job_id}")
 async def delete_job(job_id: str):
-    """Delete a job"""
-    if job_id not in active_jobs:
+    """Delete a job, cancelling it first if it is running in this process"""
+    task = running_jobs.get(job_id)
+    if task is not None:
+        task.cancel()
+        # Cancellation kills cpu workers and signals io functions; wait briefly for it
+        await asyncio.wait({task}, timeout=CANCEL_GRACE_SECONDS)
+        if not job_store.delete(job_id):
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {"message": "Job cancelled and deleted"}
+    
+    job = job_store.get(job_id)
+    if not job_store.delete(job_id):
         raise HTTPException(status_code=404, detail="Job not found")
     
-    del active_jobs[job_id]
+    if job is not None and job["status"] == "running":
+        # Running in another worker, which cancels it once it notices the record is gone
+        return JSONResponse(status_code=202, content={
+            "message": f"Job deleted; the worker running it cancels it within {CANCEL_POLL_SECONDS:g}s"
+        })
+    # Queued jobs are skipped when their turn comes
     return {"message": "Job deleted successfully"}
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+"""
+Import time budget for the serverless handlers and the project modules.
+
+Each target is imported in a fresh interpreter under ``python -X importtime``
+and the cumulative time of the modules it pulls in is summed, leaving out
+what the interpreter (and for handlers, the serverless runtime) imports
+anyway. Exits with status 1 when a
+target is over its budget, so it can run in CI. Run it from backend/:
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --handler-budget-ms 40 --project-budget-ms 300
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from utils.registry import registry
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "api")
+
+HANDLER_RUNTIME = "import http.server, json"
+
+# Loads a file by path, as the serverless runtime and the module cache do
+LOAD_FILE = (
+    "import importlib.util, sys\n"
+    "sys.path.append({directory!r})\n"
+    "spec = importlib.util.spec_from_file_location({name!r}, {path!r})\n"
+    "module = importlib.util.module_from_spec(spec)\n"
+    "spec.loader.exec_module(module)\n"
+)
+
+
+def top_level_imports(code: str) -> Dict[str, int]:
+    """Cumulative microseconds of each top-level import made by running code"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    imports = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that made them
+        if not name.startswith("  "):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def measure(code: str, startup: Dict[str, int]) -> Tuple[float, List[Tuple[str, int]]]:
+    """Milliseconds spent importing for code, and its most expensive imports"""
+    imports = {name: us for name, us in top_level_imports(code).items() if name not in startup}
+    heaviest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:3]
+    return sum(imports.values()) / 1000, heaviest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--handler-budget-ms", type=float, default=40)
+    parser.add_argument("--project-budget-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    startup = top_level_imports("pass")
+    # The serverless runtime imports these for every handler anyway
+    handler_startup = top_level_imports(HANDLER_RUNTIME)
+
+    targets = [
+        (f"api/{name}", LOAD_FILE.format(directory=API_DIR, name=name[:-3], path=os.path.join(API_DIR, name)),
+         handler_startup, args.handler_budget_ms)
+        for name in sorted(os.listdir(API_DIR)) if name.endswith(".py")
+    ]
+    for project_id, config in sorted(registry.projects.items()):
+        path = registry.module_path(project_id)
+        targets.append((
+            f"project {project_id}",
+            LOAD_FILE.format(directory=os.path.dirname(path), name=config["module"], path=path),
+            startup, args.project_budget_ms
+        ))
+
+    over_budget = False
+    for label, code, baseline, budget in targets:
+        total, heaviest = measure(code, baseline)
+        status = "ok" if total <= budget else "OVER"
+        over_budget |= total > budget
+        details = ", ".join(f"{name} {us / 1000:.1f}" for name, us in heaviest)
+        print(f"{status:<4} {label:<36} {total:>8.1f} ms / {budget:g} ms  ({details})")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Serialization and compression benchmark for large run responses.
+
+Compares the encoders used before (pydantic's model_dump_json for single
+runs, FastAPI's jsonable_encoder + json.dumps for batches) with
+utils.serialization.dumps, and reports the bytes on the wire for each
+compression setting. Run it from backend/:
+
+    python -m benchmarks.serialization
+"""
+
+import gzip
+import json
+import timeit
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from utils.compression import brotli
+from utils.serialization import ENCODER, dumps
+
+
+class ProjectResponse(BaseModel):
+    """Same shape as the run response in app.py"""
+    success: bool
+    result: Any = None
+    error: str = None
+    job_id: str = None
+    status: str = None
+
+
+def qr_result() -> Dict[str, Any]:
+    from projects.qr_generator import generate_qr
+    return generate_qr("https://example.com/" + "x" * 400, size=10)
+
+
+def links_result(count: int = 500) -> Dict[str, Any]:
+    from projects.web_link_extractor import classify_link
+    page = "https://example.com/docs/index.html"
+    links = [
+        classify_link(href, f"Link number {i}", page, "example.com", False, False, True)
+        for i, href in enumerate(
+            f"/docs/section-{i}/page.html" if i % 3 else f"https://other{i % 17}.example.org/path/{i}"
+            for i in range(count)
+        )
+    ]
+    return {
+        "success": True,
+        "url": page,
+        "page_title": "Example documentation",
+        "links_returned": len(links),
+        "links": links,
+    }
+
+
+def time_call(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Best per-call time in microseconds"""
+    number = max(1, int(0.2 / max(timeit.timeit(func, number=1), 1e-6)))
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def report(name: str, result: Any):
+    response = ProjectResponse(success=True, result=result, status="completed")
+    batch = {"success": True, "results": [{"index": i, "success": True, "result": result} for i in range(20)]}
+
+    encoders = {
+        "run: model_dump_json": lambda: response.model_dump_json().encode(),
+        "run: dumps": lambda: dumps(response.__dict__),
+        "batch x20: jsonable_encoder+json": lambda: json.dumps(jsonable_encoder(batch)).encode(),
+        "batch x20: dumps": lambda: dumps(batch),
+    }
+    print(f"\n{name}")
+    for label, func in encoders.items():
+        print(f"  {label:<36} {time_call(func):>10.1f} us  {len(func()):>9} bytes")
+
+    body = dumps(response.__dict__)
+    print(f"  {'wire size':<36} {'encode us':>10}  {'bytes':>9}")
+    print(f"  {'identity':<36} {0.0:>10.1f}  {len(body):>9}")
+    for level in (1, 6, 9):
+        print(f"  {f'gzip -{level}':<36} {time_call(lambda: gzip.compress(body, level, mtime=0)):>10.1f}"
+              f"  {len(gzip.compress(body, level, mtime=0)):>9}")
+    if brotli is not None:
+        for quality in (4, 11):
+            print(f"  {f'br q{quality}':<36} {time_call(lambda: brotli.compress(body, quality=quality)):>10.1f}"
+                  f"  {len(brotli.compress(body, quality=quality)):>9}")
+
+
+def main():
+    print(f"encoder: {ENCODER}, brotli: {'yes' if brotli is not None else 'no'}")
+    report("generate_qr (base64 PNG)", qr_result())
+    report("extract_links (500 links)", links_result())
+
+
+if __name__ == "__main__":
+    main()
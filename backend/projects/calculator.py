@@ -2,6 +2,20 @@ import re
 import math
 from typing import Union
 
+PROJECT = {
+    "id": "calculator",
+    "name": "Calculator",
+    "description": "A simple calculator application",
+    "category": "Utility",
+    "parameters": [
+        {"name": "expression", "type": "string", "description": "Mathematical expression to evaluate"}
+    ],
+    "function": "calculate",
+    # eval of user input can run unbounded (9**9**8), so it runs where a timeout can kill it
+    "execution": "cpu",
+    "cacheable": True
+}
+
 def calculate(expression: str) -> dict:
     """
     Calculate mathematical expressions safely
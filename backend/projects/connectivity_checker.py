@@ -0,0 +1,75 @@
+import requests
+import time
+from typing import Dict, Any, Optional
+
+PROJECT = {
+    "id": "connectivity_checker",
+    "name": "Website Connectivity Checker",
+    "description": "Check whether a website is reachable and how fast it responds",
+    "category": "Web",
+    "parameters": [
+        {"name": "url", "type": "string", "description": "URL of the website to check", "min_length": 1},
+        {"name": "timeout", "type": "number", "description": "Seconds to wait for a response", "default": 5, "min": 1, "max": 30}
+    ],
+    "function": "check_url",
+    "execution": "io",
+    "timeout": 35,
+    "max_concurrency": 16,
+    "coalesce": True
+}
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def check_url(url: str, timeout: float = 5, cancel_event: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Check whether a website is reachable
+
+    Args:
+        url: URL of the website to check
+        timeout: Seconds to wait for a response (default: 5)
+        cancel_event: Set by the backend when the run is cancelled
+
+    Returns:
+        Dictionary with reachability, status code and response time
+    """
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    started = time.perf_counter()
+    try:
+        # HEAD is enough to tell if a site is up; some servers only answer GET
+        response = requests.head(url, headers=HEADERS, timeout=timeout, allow_redirects=True)
+        if response.status_code in (405, 501) and not (cancel_event and cancel_event.is_set()):
+            with requests.get(url, headers=HEADERS, timeout=timeout, stream=True) as response:
+                pass
+
+        return {
+            'url': url,
+            'reachable': response.status_code < 400,
+            'status_code': response.status_code,
+            'final_url': response.url,
+            'response_time_ms': round((time.perf_counter() - started) * 1000, 1),
+            'error': None
+        }
+
+    except requests.RequestException as e:
+        return {
+            'url': url,
+            'reachable': False,
+            'status_code': None,
+            'final_url': None,
+            'response_time_ms': round((time.perf_counter() - started) * 1000, 1),
+            'error': str(e)
+        }
+
+def check_urls(urls: list, timeout: float = 5) -> Dict[str, Any]:
+    """Check several websites one after another"""
+    results = [check_url(url, timeout) for url in urls]
+
+    return {
+        'results': results,
+        'count': len(results),
+        'reachable': len([r for r in results if r['reachable']])
+    }
@@ -2,6 +2,19 @@ import random
 import string
 from typing import Optional
 
+PROJECT = {
+    "id": "password_generator",
+    "name": "Password Generator",
+    "description": "Generate secure random passwords",
+    "category": "Security",
+    "parameters": [
+        {"name": "length", "type": "integer", "description": "Password length", "default": 12, "min": 1, "max": 256},
+        {"name": "include_symbols", "type": "boolean", "description": "Include symbols", "default": True}
+    ],
+    "function": "generate_password",
+    "execution": "inline"
+}
+
 def generate_password(length: int = 12, include_symbols: bool = True, include_numbers: bool = True, 
                      include_uppercase: bool = True, include_lowercase: bool = True) -> dict:
     """
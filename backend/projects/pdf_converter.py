@@ -0,0 +1,112 @@
+import base64
+from io import BytesIO
+from typing import List, Tuple
+
+PROJECT = {
+    "id": "pdf_converter",
+    "name": "PDF Converter",
+    "description": "Convert images and text to PDF, or PDF pages to images",
+    "category": "Utility",
+    "parameters": [
+        {"name": "conversion_type", "type": "string", "description": "Conversion to run", "options": ["image_to_pdf", "pdf_to_images", "text_to_pdf"]},
+        {"name": "input_data", "type": "string", "description": "Base64 image or PDF (data URLs accepted), or the text", "min_length": 1},
+        {"name": "output", "type": "string", "description": "Return files as artifact URLs or inline as base64", "options": ["artifact", "inline"], "default": "artifact"}
+    ],
+    "function": "convert_pdf",
+    "execution": "cpu",
+    "timeout": 60
+}
+
+def decode_input(data: str) -> bytes:
+    """Bytes of a base64 string or data URL"""
+    return base64.b64decode(data.split(',', 1)[1] if ',' in data else data)
+
+def image_to_pdf(image_bytes: bytes) -> bytes:
+    """Convert an image to a single page PDF"""
+    from fpdf import FPDF
+    from PIL import Image
+
+    image = Image.open(BytesIO(image_bytes))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.image(image, x=10, y=10, w=190)
+    return bytes(pdf.output())
+
+def pdf_to_images(pdf_data: bytes) -> List[bytes]:
+    """Convert each page of a PDF to PNG bytes"""
+    # Imported here as only this conversion needs it, and it needs poppler installed
+    from pdf2image import convert_from_bytes
+
+    pages = []
+    for image in convert_from_bytes(pdf_data):
+        buffered = BytesIO()
+        image.save(buffered, format='PNG')
+        pages.append(buffered.getvalue())
+    return pages
+
+def text_to_pdf(text: str) -> bytes:
+    """Convert text to PDF"""
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=12)
+    for line in text.split('\n'):
+        pdf.multi_cell(0, 10, line)
+        # Back to the left margin for the next line
+        pdf.set_x(pdf.l_margin)
+    return bytes(pdf.output())
+
+def convert_pdf(conversion_type: str, input_data: str, output: str = "artifact", artifacts=None) -> dict:
+    """
+    Convert between PDF and images or text
+
+    Args:
+        conversion_type: "image_to_pdf", "pdf_to_images" or "text_to_pdf"
+        input_data: Base64 image or PDF, or the text for text_to_pdf
+        output: "artifact" to store each file in the artifact store and return
+            its URL, "inline" for base64 data URLs (default: "artifact")
+        artifacts: Artifact store, passed in by the backend
+
+    Returns:
+        Dictionary with one entry per produced file
+    """
+    try:
+        files: List[Tuple[bytes, str]]
+        if conversion_type == "image_to_pdf":
+            files = [(image_to_pdf(decode_input(input_data)), "application/pdf")]
+        elif conversion_type == "pdf_to_images":
+            files = [(page, "image/png") for page in pdf_to_images(decode_input(input_data))]
+        elif conversion_type == "text_to_pdf":
+            files = [(text_to_pdf(input_data), "application/pdf")]
+        else:
+            raise ValueError(f"Unsupported conversion type: {conversion_type}")
+
+        if output == "artifact" and artifacts is not None:
+            results = [artifacts.put(data, content_type) for data, content_type in files]
+        else:
+            results = [
+                {
+                    "url": f"data:{content_type};base64,{base64.b64encode(data).decode()}",
+                    "size": len(data),
+                    "content_type": content_type
+                }
+                for data, content_type in files
+            ]
+
+        return {
+            "conversion_type": conversion_type,
+            "files": results,
+            "count": len(results)
+        }
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "conversion_type": conversion_type,
+            "files": [],
+            "count": 0
+        }
@@ -3,7 +3,22 @@ from io import BytesIO
 import base64
 from typing import Optional
 
-def generate_qr(text: str, size: int = 10, border: int = 4) -> dict:
+PROJECT = {
+    "id": "qr_generator",
+    "name": "QR Code Generator",
+    "description": "Generate QR codes from text",
+    "category": "Utility",
+    "parameters": [
+        {"name": "text", "type": "string", "description": "Text to encode in QR code", "min_length": 1, "max_length": 2953},
+        {"name": "output", "type": "string", "description": "Return the image inline as base64 or as an artifact URL", "options": ["inline", "artifact"], "default": "inline"}
+    ],
+    "function": "generate_qr",
+    "execution": "cpu",
+    "timeout": 15,
+    "cacheable": True
+}
+
+def generate_qr(text: str, size: int = 10, border: int = 4, output: str = "inline", artifacts=None) -> dict:
     """
     Generate QR code from text
     
@@ -11,6 +26,9 @@ def generate_qr(text: str, size: int = 10, border: int = 4) -> dict:
         text: Text to encode in QR code
         size: Size of the QR code (default: 10)
         border: Border size (default: 4)
+        output: "inline" for a base64 data URL, "artifact" to store the PNG
+            in the artifact store and return its URL (default: "inline")
+        artifacts: Artifact store, passed in by the backend
         
     Returns:
         Dictionary with QR code data and info
@@ -33,9 +51,21 @@ def generate_qr(text: str, size: int = 10, border: int = 4) -> dict:
         # Create image
         img = qr.make_image(fill_color="black", back_color="white")
         
-        # Convert to base64 for web display
         buffered = BytesIO()
         img.save(buffered, format="PNG")
+        
+        if output == "artifact" and artifacts is not None:
+            artifact = artifacts.put(buffered.getvalue(), "image/png")
+            return {
+                "text": text,
+                "qr_code": artifact["url"],
+                "artifact_id": artifact["artifact_id"],
+                "size": size,
+                "border": border,
+                "format": "PNG"
+            }
+        
+        # Convert to base64 for web display
         img_str = base64.b64encode(buffered.getvalue()).decode()
         
         return {
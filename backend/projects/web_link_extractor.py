@@ -1,8 +1,83 @@
+import codecs
 import requests
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 from urllib.parse import urljoin, urlparse
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Optional
+
+PROJECT = {
+    "id": "web_link_extractor",
+    "name": "Web Link Extractor",
+    "description": "Extract all links from any webpage with filtering options",
+    "category": "Web",
+    "parameters": [
+        {"name": "url", "type": "string", "description": "URL of the webpage to extract links from"},
+        {"name": "max_links", "type": "integer", "description": "Maximum number of links to return", "default": 50, "min": 1, "max": 1000},
+        {"name": "filter_internal", "type": "boolean", "description": "Only show internal links (same domain)", "default": False},
+        {"name": "filter_external", "type": "boolean", "description": "Only show external links (different domain)", "default": False},
+        {"name": "include_emails", "type": "boolean", "description": "Include email links (mailto:)", "default": True}
+    ],
+    "function": "extract_links",
+    "stream_function": "iter_links",
+    "execution": "io",
+    "timeout": 30,
+    "max_concurrency": 8,
+    "coalesce": True
+}
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def normalize_url(url: str) -> str:
+    """Strip the URL and add a protocol if missing"""
+    url = url.strip()
+    if not url:
+        raise ValueError("URL cannot be empty")
+    
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+def classify_link(href: str, text: str, page_url: str, base_domain: str, filter_internal: bool,
+                  filter_external: bool, include_emails: bool) -> Optional[Dict[str, Any]]:
+    """Turn an anchor into link info, or None if it is filtered out"""
+    if not href:
+        return None
+    
+    # Handle email links
+    if href.startswith('mailto:'):
+        if include_emails:
+            return {
+                'url': href,
+                'text': text,
+                'type': 'email'
+            }
+        return None
+    
+    # Convert relative URLs to absolute
+    full_url = urljoin(page_url, href)
+    
+    # Parse URL for domain filtering
+    parsed_url = urlparse(full_url)
+    is_internal = parsed_url.netloc == base_domain or parsed_url.netloc == ''
+    
+    # Apply filters
+    if filter_internal and not is_internal:
+        return None
+    if filter_external and is_internal:
+        return None
+    
+    # Skip common non-useful links
+    if href.startswith(('#', 'javascript:', 'tel:')):
+        return None
+    
+    return {
+        'url': full_url,
+        'text': text,
+        'type': 'internal' if is_internal else 'external',
+        'domain': parsed_url.netloc or base_domain
+    }
 
 def extract_links(url: str, max_links: int = 50, filter_internal: bool = False, 
                  filter_external: bool = False, include_emails: bool = True) -> Dict[str, Any]:
@@ -21,23 +96,14 @@ def extract_links(url: str, max_links: int = 50, filter_internal: bool = False,
     """
     try:
         # Clean and validate URL
-        url = url.strip()
-        if not url:
-            raise ValueError("URL cannot be empty")
-        
-        # Add protocol if missing
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
+        url = normalize_url(url)
         
         # Make request with headers to avoid blocking
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers=HEADERS, timeout=10)
         response.raise_for_status()
         
-        # Parse HTML
+        # Parse HTML; bs4 is imported here as the streaming path does not need it
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(response.text, 'html.parser')
         
         # Extract base domain for filtering
@@ -53,44 +119,15 @@ def extract_links(url: str, max_links: int = 50, filter_internal: bool = False,
             href = link_elem.get('href', '').strip()
             text = link_elem.get_text(strip=True) or 'No text'
             
-            if not href:
+            link_info = classify_link(href, text, url, base_domain, filter_internal,
+                                      filter_external, include_emails)
+            if link_info is None:
                 continue
             
-            # Handle email links
-            if href.startswith('mailto:'):
-                if include_emails:
-                    email_links.append({
-                        'url': href,
-                        'text': text,
-                        'type': 'email'
-                    })
-                continue
-            
-            # Convert relative URLs to absolute
-            full_url = urljoin(url, href)
-            
-            # Parse URL for domain filtering
-            parsed_url = urlparse(full_url)
-            is_internal = parsed_url.netloc == base_domain or parsed_url.netloc == ''
-            
-            # Apply filters
-            if filter_internal and not is_internal:
-                continue
-            if filter_external and is_internal:
-                continue
-            
-            # Skip common non-useful links
-            if href.startswith(('#', 'javascript:', 'tel:')):
-                continue
-            
-            link_info = {
-                'url': full_url,
-                'text': text,
-                'type': 'internal' if is_internal else 'external',
-                'domain': parsed_url.netloc or base_domain
-            }
-            
-            extracted_links.append(link_info)
+            if link_info['type'] == 'email':
+                email_links.append(link_info)
+            else:
+                extracted_links.append(link_info)
         
         # Limit results
         if max_links > 0:
@@ -141,6 +178,157 @@ def extract_links(url: str, max_links: int = 50, filter_internal: bool = False,
             'url': url
         }
 
+class LinkParser(HTMLParser):
+    """Incremental HTML parser collecting anchors, the title and meta description"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.anchors = []
+        self.total_links = 0
+        self.title = None
+        self.description = None
+        self._href = None
+        self._anchor_text = []
+        self._title_text = None
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'a' and 'href' in attrs:
+            self._flush_anchor()
+            self._href = attrs['href'] or ''
+            self._anchor_text = []
+        elif tag == 'title' and self.title is None:
+            self._title_text = []
+        elif tag == 'meta' and (attrs.get('name') or '').lower() == 'description':
+            if self.description is None:
+                self.description = attrs.get('content') or 'No description'
+    
+    def handle_endtag(self, tag):
+        if tag == 'a':
+            self._flush_anchor()
+        elif tag == 'title' and self._title_text is not None:
+            self.title = ''.join(self._title_text).strip()
+            self._title_text = None
+    
+    def handle_data(self, data):
+        if self._href is not None:
+            self._anchor_text.append(data)
+        if self._title_text is not None:
+            self._title_text.append(data)
+    
+    def close(self):
+        super().close()
+        self._flush_anchor()
+    
+    def _flush_anchor(self):
+        if self._href is not None:
+            # Collapse whitespace, keeping the spaces between inline elements
+            text = ' '.join(''.join(self._anchor_text).split())
+            self.anchors.append((self._href.strip(), text))
+            self.total_links += 1
+            self._href = None
+
+def iter_links(url: str, max_links: int = 50, filter_internal: bool = False,
+               filter_external: bool = False, include_emails: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Stream links from a webpage as they are parsed
+    
+    Takes the same arguments as extract_links. The page is downloaded and parsed
+    in chunks, and downloading stops once every requested link has been found.
+    
+    Yields:
+        Events tagged with an "event" key: "progress" while downloading, "link"
+        for each link found, then "summary" (or "error" on failure)
+    """
+    try:
+        url = normalize_url(url)
+        base_domain = urlparse(url).netloc
+        link_limit = max_links if max_links > 0 else None
+        email_limit = max_links // 2 if max_links > 0 else None
+        counts = {'internal': 0, 'external': 0, 'email': 0}
+        received = 0
+        parser = LinkParser()
+        
+        def drain():
+            # Classify the anchors parsed so far and emit those within limits
+            for href, text in parser.anchors:
+                link_info = classify_link(href, text or 'No text', url, base_domain,
+                                          filter_internal, filter_external, include_emails)
+                if link_info is None:
+                    continue
+                
+                if link_info['type'] == 'email':
+                    if email_limit is not None and counts['email'] >= email_limit:
+                        continue
+                elif link_limit is not None and counts['internal'] + counts['external'] >= link_limit:
+                    continue
+                
+                counts[link_info['type']] += 1
+                yield dict(link_info, event='link')
+            parser.anchors = []
+        
+        def limits_reached():
+            links_done = link_limit is not None and counts['internal'] + counts['external'] >= link_limit
+            emails_done = not include_emails or (email_limit is not None and counts['email'] >= email_limit)
+            return links_done and emails_done
+        
+        with requests.get(url, headers=HEADERS, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            total_size = int(response.headers.get('Content-Length') or 0)
+            try:
+                decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+            except LookupError:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            
+            for chunk in response.iter_content(chunk_size=16384):
+                received += len(chunk)
+                # Characters split across chunks are held back until the rest arrives
+                parser.feed(decoder.decode(chunk))
+                yield from drain()
+                
+                yield {
+                    'event': 'progress',
+                    'bytes_received': received,
+                    'percent': round(received * 100 / total_size, 1) if total_size else None
+                }
+                
+                # Stop downloading once every limit is reached
+                if limits_reached():
+                    break
+        
+        parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+        yield from drain()
+        
+        yield {
+            'event': 'summary',
+            'success': True,
+            'url': url,
+            'page_title': parser.title or 'No title',
+            'page_description': parser.description or 'No description',
+            'total_links_found': parser.total_links,
+            'links_returned': counts['internal'] + counts['external'],
+            'email_links_returned': counts['email'],
+            'internal_links_count': counts['internal'],
+            'external_links_count': counts['external'],
+            'bytes_received': received
+        }
+        
+    except requests.RequestException as e:
+        yield {
+            'event': 'error',
+            'success': False,
+            'error': f'Failed to fetch webpage: {str(e)}',
+            'url': url
+        }
+    except Exception as e:
+        yield {
+            'event': 'error',
+            'success': False,
+            'error': f'Error processing webpage: {str(e)}',
+            'url': url
+        }
+
 def get_domain_links(url: str, max_links: int = 20) -> Dict[str, Any]:
     """Get only internal links from the same domain"""
     return extract_links(url, max_links=max_links, filter_internal=True)
@@ -0,0 +1,237 @@
+"""
+Admission control for project runs.
+
+Each project and each client IP can have a token bucket, which limits the
+request rate, and a concurrency limit with a short bounded wait queue. A
+request that would exceed either is rejected straight away with a
+``Retry-After`` hint, so a burst of heavy requests is turned away at the door
+instead of piling up on the executors.
+
+Everything here runs on the event loop, so no locking is needed.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is over a rate or concurrency limit."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many requests ({reason.replace('_', ' ')})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """Allow ``rate`` requests per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: int = 1) -> float:
+        """Take cost tokens; return 0 on success or the seconds until one is available
+
+        A cost above the tokens left is still taken once one is available,
+        leaving the bucket in debt, so batches larger than the burst are
+        admitted and paid for by the requests after them.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= cost
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ConcurrencyLimit:
+    """At most ``limit`` holders, with up to ``queue_size`` callers waiting."""
+
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def idle(self) -> bool:
+        return self.active == 0 and not self._waiters
+
+    async def acquire(self, timeout: Optional[float]) -> bool:
+        """Take a slot, waiting up to timeout when the queue has room
+
+        A timeout of None waits for a slot however long the queue is.
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if timeout is not None and (len(self._waiters) >= self.queue_size or timeout <= 0):
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self):
+        # Hand the slot straight to the next live waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionController:
+    """Rate and concurrency limits per project and per client."""
+
+    def __init__(self, client_rate: float = 0, client_burst: float = 0,
+                 client_concurrency: int = 0, queue_size: int = 0,
+                 queue_timeout: float = 0, max_clients: int = 10000):
+        self.client_rate = client_rate
+        self.client_burst = client_burst or client_rate
+        self.client_concurrency = client_concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        # Called as on_reject(project_id, reason) and on_queue(project_id, depth)
+        self.on_reject: Optional[Callable[[str, str], None]] = None
+        self.on_queue: Optional[Callable[[str, int], None]] = None
+        self._project_buckets: Dict[str, TokenBucket] = {}
+        self._project_limits: Dict[str, ConcurrencyLimit] = {}
+        self._waiting: Dict[str, int] = {}
+        self._clients: "OrderedDict[str, Tuple[Optional[TokenBucket], Optional[ConcurrencyLimit]]]" = OrderedDict()
+
+    def _project(self, project_id: str, project_config: Dict[str, Any]):
+        if project_id not in self._project_buckets and project_id not in self._project_limits:
+            rate_limit = project_config.get("rate_limit")
+            if rate_limit:
+                self._project_buckets[project_id] = TokenBucket(
+                    rate_limit["rate"], rate_limit.get("burst", rate_limit["rate"])
+                )
+            max_concurrency = project_config.get("max_concurrency")
+            if max_concurrency:
+                self._project_limits[project_id] = ConcurrencyLimit(max_concurrency, self.queue_size)
+        return self._project_buckets.get(project_id), self._project_limits.get(project_id)
+
+    def _client(self, client: str):
+        if client in self._clients:
+            self._clients.move_to_end(client)
+            return self._clients[client]
+
+        # Forget idle clients once the table is full
+        while len(self._clients) >= self.max_clients:
+            oldest = next(iter(self._clients))
+            _, limit = self._clients[oldest]
+            if limit is not None and not limit.idle:
+                self._clients.move_to_end(oldest)
+                break
+            del self._clients[oldest]
+
+        entry = (
+            TokenBucket(self.client_rate, self.client_burst) if self.client_rate > 0 else None,
+            ConcurrencyLimit(self.client_concurrency, self.queue_size) if self.client_concurrency > 0 else None,
+        )
+        self._clients[client] = entry
+        return entry
+
+    def queue_depth(self, project_id: str) -> int:
+        """Requests for a project currently waiting for a concurrency slot"""
+        return self._waiting.get(project_id, 0)
+
+    def _set_waiting(self, project_id: str, delta: int):
+        self._waiting[project_id] = self._waiting.get(project_id, 0) + delta
+        if self.on_queue is not None:
+            self.on_queue(project_id, self._waiting[project_id])
+
+    def _reject(self, project_id: str, reason: str, retry_after: float):
+        if self.on_reject is not None:
+            self.on_reject(project_id, reason)
+        raise AdmissionRejected(reason, retry_after)
+
+    def check_rate(self, project_id: str, project_config: Dict[str, Any], client: str,
+                   cost: int = 1):
+        """Take cost tokens from the client's and the project's buckets or reject"""
+        client_bucket, _ = self._client(client)
+        if client_bucket is not None:
+            wait = client_bucket.take(cost)
+            if wait:
+                self._reject(project_id, "client_rate", wait)
+
+        project_bucket, _ = self._project(project_id, project_config)
+        if project_bucket is not None:
+            wait = project_bucket.take(cost)
+            if wait:
+                self._reject(project_id, "project_rate", wait)
+
+    async def _acquire(self, project_id: str, limit: ConcurrencyLimit, reason: str, wait: bool):
+        queued = limit.active >= limit.limit or limit.depth > 0
+        if queued:
+            self._set_waiting(project_id, 1)
+        try:
+            admitted = await limit.acquire(None if wait else self.queue_timeout)
+        finally:
+            if queued:
+                self._set_waiting(project_id, -1)
+        if not admitted:
+            self._reject(project_id, reason, self.queue_timeout or 1)
+
+    @asynccontextmanager
+    async def admit(self, project_id: str, project_config: Dict[str, Any],
+                    client: str) -> AsyncIterator[None]:
+        """Hold rate and concurrency admission for one run"""
+        self.check_rate(project_id, project_config, client)
+        async with self.slot(project_id, project_config, client):
+            yield
+
+    @asynccontextmanager
+    async def slot(self, project_id: str, project_config: Dict[str, Any], client: Optional[str],
+                   wait: bool = False) -> AsyncIterator[None]:
+        """Hold the client's and the project's concurrency slots, without a rate check
+
+        With wait set the slots are waited for however long the queue is,
+        for work that was admitted already, such as the items of a batch.
+        Without a client only the project's slot is held.
+        """
+        _, client_limit = self._client(client) if client is not None else (None, None)
+        _, project_limit = self._project(project_id, project_config)
+        held = []
+        try:
+            if client_limit is not None:
+                await self._acquire(project_id, client_limit, "client_concurrency", wait)
+                held.append(client_limit)
+            if project_limit is not None:
+                await self._acquire(project_id, project_limit, "project_concurrency", wait)
+                held.append(project_limit)
+            yield
+        finally:
+            for limit in held:
+                limit.release()
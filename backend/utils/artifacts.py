@@ -0,0 +1,264 @@
+"""
+Content-addressed store for binary results such as images.
+
+Instead of returning large base64 strings, a project function that takes an
+``artifacts`` argument can write bytes with ``artifacts.put(data,
+content_type)`` and return the short artifact id. Ids are derived from the
+content, so writing the same bytes twice stores them once. The files live in
+a directory on local disk that every process (including cpu workers) shares.
+When the directory grows past its byte budget, the least recently used
+artifacts are deleted.
+
+``GET /artifacts/{id}`` serves them through ArtifactResponse, which supports
+single byte ranges and hands the file to the server's zero-copy send when the
+ASGI server offers one.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+from typing import Any, BinaryIO, Dict, Iterable, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from utils.settings import ARTIFACT_DIR, ARTIFACT_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+# Hex digits of the content hash kept in an id (128 bits)
+ID_HEX_DIGITS = 32
+
+ID_PATTERN = re.compile(r"^[0-9a-f]{%d}(\.[a-z0-9]{1,8})?$" % ID_HEX_DIGITS)
+
+# Eviction deletes down to this fraction of the byte budget
+EVICT_TO = 0.9
+
+CHUNK_SIZE = 64 * 1024
+
+
+def artifact_ids(result: Any) -> Iterable[str]:
+    """Artifact ids referenced by "artifact_id" keys anywhere in a result"""
+    if isinstance(result, dict):
+        for key, value in result.items():
+            if key == "artifact_id" and isinstance(value, str):
+                yield value
+            else:
+                yield from artifact_ids(value)
+    elif isinstance(result, list):
+        for item in result:
+            yield from artifact_ids(item)
+
+
+class ArtifactStore:
+    """Artifacts on disk, keyed by content hash, with LRU eviction."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        # Bytes on disk as of the last scan plus what this process wrote since;
+        # other processes' writes are picked up by the next scan
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, artifact_id: str) -> str:
+        return os.path.join(self.root, artifact_id[:2], artifact_id)
+
+    def put(self, data: bytes, content_type: str = "application/octet-stream") -> Dict[str, Any]:
+        """Store data and return its id, URL, size and content type"""
+        extension = mimetypes.guess_extension(content_type) or ".bin"
+        artifact_id = hashlib.sha256(data).hexdigest()[:ID_HEX_DIGITS] + extension
+        path = self._path(artifact_id)
+
+        try:
+            # Already stored; mark it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._grow(len(data))
+
+        return {
+            "artifact_id": artifact_id,
+            "url": f"/artifacts/{artifact_id}",
+            "size": len(data),
+            "content_type": content_type,
+        }
+
+    def open(self, artifact_id: str) -> Optional[BinaryIO]:
+        """Open an artifact for reading, or None if it does not exist"""
+        if not ID_PATTERN.match(artifact_id):
+            return None
+        path = self._path(artifact_id)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Evicted after opening; the open file is still readable
+        return f
+
+    def exists(self, artifact_id: str) -> bool:
+        return bool(ID_PATTERN.match(artifact_id)) and os.path.exists(self._path(artifact_id))
+
+    def _grow(self, written: int):
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()[0]
+            else:
+                self._size += written
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def _disk_usage(self) -> Tuple[int, list]:
+        total, files = 0, []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                total += stat.st_size
+                files.append((stat.st_mtime, stat.st_size, path))
+        return total, files
+
+    def _evict(self) -> int:
+        """Delete least recently used artifacts until under budget; returns the new size"""
+        total, files = self._disk_usage()
+        target = self.max_bytes * EVICT_TO
+        if total <= self.max_bytes:
+            return total
+        files.sort()
+        evicted = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        logger.info("Evicted %d artifacts, %d bytes left", evicted, total)
+        return total
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) of a single "bytes=" range, inclusive
+
+    Returns None when there is no usable Range header, so the whole file is
+    sent, and raises ValueError when the range cannot be satisfied. A range
+    ending before it starts is malformed and ignored, as RFC 9110 requires.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        # Multiple ranges are allowed to be answered with the full content
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+
+class ArtifactResponse(Response):
+    """Sends an open artifact file, or one byte range of it."""
+
+    def __init__(self, file: BinaryIO, status_code: int, headers: Dict[str, str],
+                 start: int = 0, length: int = 0, send_body: bool = True):
+        super().__init__(status_code=status_code, headers=headers)
+        self.file = file
+        self.start = start
+        self.length = length
+        self.send_body = send_body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if not self.send_body or self.length == 0:
+                await send({"type": "http.response.body", "body": b""})
+            elif "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": self.file,
+                    "offset": self.start,
+                    "count": self.length,
+                })
+            else:
+                await anyio.to_thread.run_sync(self.file.seek, self.start)
+                remaining = self.length
+                while remaining > 0:
+                    chunk = await anyio.to_thread.run_sync(self.file.read, min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    # Truncated under us; end the response rather than hang
+                    await send({"type": "http.response.body", "body": b""})
+        finally:
+            self.file.close()
+
+
+def artifact_response(artifact_id: str, file: BinaryIO, request_headers: Any,
+                      send_body: bool = True) -> Response:
+    """Response for an artifact honouring If-None-Match, Range and If-Range"""
+    size = os.fstat(file.fileno()).st_size
+    etag = f'"{artifact_id}"'
+    headers = {
+        "ETag": etag,
+        # Ids are content hashes, so an artifact never changes
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+        file.close()
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Type"] = mimetypes.guess_type(artifact_id)[0] or "application/octet-stream"
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        file.close()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return ArtifactResponse(file, 200, headers, 0, size, send_body)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return ArtifactResponse(file, 206, headers, start, end - start + 1, send_body)
+
+
+# Shared by the app and the cpu worker processes
+artifact_store = ArtifactStore(ARTIFACT_DIR, ARTIFACT_MAX_MB * 1024 * 1024)
@@ -0,0 +1,120 @@
+"""
+Result cache for deterministic projects.
+
+Results are keyed by project id and canonicalized parameters. A bounded LRU
+tier lives in memory; an optional disk tier keeps results across restarts
+and workers until their TTL runs out.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Returned by ResultCache.get on a miss, since None is a valid result
+MISSING = object()
+
+
+def cache_key(project_id: str, parameters: Dict[str, Any]) -> str:
+    """Stable key for a project call, independent of parameter order"""
+    canonical = json.dumps(parameters, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{project_id}\0{canonical}".encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache: in-memory LRU backed by an optional directory of JSON files."""
+
+    def __init__(self, max_entries: int, disk_dir: Optional[str] = None, disk_ttl: float = 86400):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_ttl = disk_ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Any:
+        """Return the cached result for key, or MISSING"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        if self.disk_dir:
+            value = self._read_disk(key)
+            if value is not MISSING:
+                self._remember(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return MISSING
+
+    def set(self, key: str, value: Any):
+        """Store a result in memory and, when enabled, on disk"""
+        self._remember(key, value)
+        if self.disk_dir:
+            self._write_disk(key, value)
+
+    def clear(self):
+        """Drop the in-memory tier"""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "disk_enabled": bool(self.disk_dir)
+        }
+
+    def _remember(self, key: str, value: Any):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Any:
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.disk_ttl:
+                os.remove(path)
+                return MISSING
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return MISSING
+
+    def _write_disk(self, key: str, value: Any):
+        path = self._disk_path(key)
+        try:
+            data = json.dumps(value, default=str)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except (OSError, ValueError):
+            pass  # The disk tier is best effort
@@ -0,0 +1,104 @@
+"""
+Pre-encoded JSON responses with strong ETags and compressed variants.
+
+The project catalog only changes when the project sources do, yet the
+frontend fetches it on every page load. An EncodedPayload serializes it
+once, precomputes gzip (and brotli, when the ``brotli`` package is
+installed) variants, and answers conditional requests with 304. It has no
+web framework dependencies, so the FastAPI app and the serverless handlers
+in api/ can share it.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip")
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> set:
+    """Content codings a client accepts, ignoring those with q=0"""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, *params = [value.strip() for value in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    if "*" in accepted:
+        accepted.update(ENCODINGS)
+    return accepted
+
+
+class EncodedPayload:
+    """A JSON body encoded once, with its ETag and compressed variants."""
+
+    def __init__(self, payload: Any):
+        self.body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # Each coding is a distinct representation, so it gets its own strong ETag
+        self.variants: Dict[str, Tuple[bytes, str]] = {
+            "gzip": (gzip.compress(self.body, 9, mtime=0), f'"{digest}-gzip"'),
+        }
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(self.body), f'"{digest}-br"')
+        self._etags = {self.etag} | {etag for _, etag in self.variants.values()}
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether If-None-Match names any representation of this payload"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        tags = {tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")}
+        return not tags.isdisjoint(self._etags)
+
+    def select(self, accept_encoding: Optional[str], if_none_match: Optional[str],
+               cache_control: str) -> Tuple[int, bytes, Dict[str, str]]:
+        """Status, body and headers for a request with the given headers"""
+        accepted = accepted_encodings(accept_encoding)
+        coding = next((c for c in ENCODINGS if c in self.variants and c in accepted), None)
+        body, etag = self.variants[coding] if coding else (self.body, self.etag)
+
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if self.matches(if_none_match):
+            return 304, b"", headers
+
+        headers["Content-Type"] = "application/json"
+        if coding:
+            headers["Content-Encoding"] = coding
+        return 200, body, headers
+
+
+class PayloadCache:
+    """Keeps the EncodedPayload for the current version of its source."""
+
+    def __init__(self):
+        self._current: Optional[Tuple[str, EncodedPayload]] = None
+        self._lock = threading.Lock()
+
+    def get(self, version: str, build: Callable[[], Any]) -> EncodedPayload:
+        """Return the payload for version, building and encoding it if needed"""
+        current = self._current
+        if current is not None and current[0] == version:
+            return current[1]
+        with self._lock:
+            if self._current is None or self._current[0] != version:
+                self._current = (version, EncodedPayload(build()))
+            return self._current[1]
@@ -0,0 +1,99 @@
+"""
+Response compression middleware.
+
+Compresses complete response bodies above a size threshold with brotli
+(when installed) or gzip, depending on Accept-Encoding. Streaming responses
+(NDJSON, Server-Sent Events) and bodies that are already encoded, such as
+the precompressed catalog, pass through untouched, so events are never held
+back in a compressor's buffer.
+"""
+
+import gzip
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.catalog import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+class CompressionMiddleware:
+    """gzip/brotli for complete bodies of at least minimum_size bytes."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _coding(self, scope: Scope) -> Optional[str]:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding"))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def compress(self, body: bytes, coding: str) -> bytes:
+        if coding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, self.gzip_level, mtime=0)
+
+    def _should_compress(self, headers: MutableHeaders, body: bytes) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            len(body) >= self.minimum_size
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = self._coding(scope)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether it streams
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(raw=response_start["headers"])
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(headers, body):
+                await send(response_start)
+                await send(message)
+                return
+
+            body = self.compress(body, coding)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # The compressed bytes are a different representation
+                headers["ETag"] = f"W/{etag}"
+            await send(response_start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
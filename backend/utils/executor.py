@@ -0,0 +1,209 @@
+"""
+Execution of project functions off the event loop.
+
+Each project declares an execution class in PROJECTS_CONFIG:
+
+- ``inline``: trivial work, called directly on the event loop
+- ``io``: blocking I/O, run on a bounded thread pool
+- ``cpu``: CPU-bound work, run on a pool of worker processes
+
+Every class has its own concurrency limit, so a burst of slow scrapes cannot
+starve cheap calls or the rest of the API.
+
+Calls can be given a timeout. A ``cpu`` worker that overruns is killed and
+replaced. Threads cannot be killed, so ``io`` functions that accept a
+``cancel_event`` argument get a threading.Event that is set on timeout or
+cancellation, and should return early once it is set. Functions that accept
+an ``artifacts`` argument get the artifact store (see utils.artifacts), in
+every execution class, to write binary results to instead of returning them.
+
+Generator functions can also be streamed item by item. Generators cannot
+cross process boundaries, so non-inline streams always run on the thread
+pool.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Sequence, Tuple
+
+from utils.artifacts import artifact_store
+from utils.loader import module_cache
+from utils.worker_pool import ProcessWorkerPool
+
+EXECUTION_CLASSES = ("inline", "io", "cpu")
+
+# Items a streaming producer may run ahead of its consumer
+STREAM_BUFFER = 64
+
+# The io thread pool holds this many times the io concurrency limit in
+# threads, so calls that timed out but are still winding down do not starve
+# new ones of threads
+IO_THREAD_HEADROOM = 2
+
+_ITEM, _ERROR, _DONE = range(3)
+
+
+@functools.lru_cache(maxsize=None)
+def accepted_arguments(func: Callable) -> frozenset:
+    """Names of the arguments a project function takes"""
+    try:
+        return frozenset(inspect.signature(func).parameters)
+    except (TypeError, ValueError):
+        return frozenset()
+
+
+def call_project_function(module_name: str, module_path: str, function_name: str,
+                          parameters: Dict[str, Any],
+                          cancel_event: Optional[threading.Event] = None) -> Any:
+    """Load a project function through the module cache and call it"""
+    func = module_cache.get_function(module_name, module_path, function_name)
+    accepted = accepted_arguments(func)
+    if cancel_event is not None and "cancel_event" in accepted:
+        parameters = {**parameters, "cancel_event": cancel_event}
+    if "artifacts" in accepted:
+        parameters = {**parameters, "artifacts": artifact_store}
+    return func(**parameters)
+
+
+class ProjectExecutor:
+    """Dispatch project calls to the executor matching their execution class."""
+
+    def __init__(self, limits: Dict[str, int], worker_options: Optional[Dict[str, int]] = None):
+        self.limits = limits
+        # Recycling and resource limits passed to ProcessWorkerPool
+        self.worker_options = worker_options or {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessWorkerPool] = None
+
+    def _semaphore(self, execution: str) -> asyncio.Semaphore:
+        # Created lazily so they bind to the running event loop
+        if execution not in self._semaphores:
+            self._semaphores[execution] = asyncio.Semaphore(self.limits[execution])
+        return self._semaphores[execution]
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.limits["io"] * IO_THREAD_HEADROOM, thread_name_prefix="project-io"
+            )
+        return self._thread_pool
+
+    @property
+    def process_pool(self) -> ProcessWorkerPool:
+        if self._process_pool is None:
+            self._process_pool = ProcessWorkerPool(self.limits["cpu"], **self.worker_options)
+        return self._process_pool
+
+    def warm_up(self, preload: Sequence[Tuple[str, str]]):
+        """Start the cpu worker processes now with the given project modules imported"""
+        self.process_pool.start(preload)
+
+    async def run(self, execution: str, module_name: str, module_path: str,
+                  function_name: str, parameters: Dict[str, Any],
+                  timeout: Optional[float] = None) -> Any:
+        """Run a project function under its execution class's limits
+
+        Raises asyncio.TimeoutError if the call takes longer than timeout.
+        Inline calls run on the event loop and cannot be interrupted.
+        """
+        if execution not in EXECUTION_CLASSES:
+            raise ValueError(f"Unknown execution class: {execution}")
+
+        async with self._semaphore(execution):
+            if execution == "inline":
+                return call_project_function(module_name, module_path, function_name, parameters)
+
+            if execution == "cpu":
+                return await self.process_pool.run(
+                    module_name, module_path, function_name, parameters, timeout
+                )
+
+            loop = asyncio.get_running_loop()
+            cancel_event = threading.Event()
+            call = functools.partial(
+                call_project_function, module_name, module_path, function_name, parameters, cancel_event
+            )
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(self._get_thread_pool(), call), timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # Ask a cooperative function to stop; the slot is released either way
+                cancel_event.set()
+                raise
+
+    async def stream(self, execution: str, module_name: str, module_path: str,
+                     function_name: str, parameters: Dict[str, Any],
+                     timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """Iterate a generator project function without blocking the event loop
+
+        Raises asyncio.TimeoutError once the whole stream has taken longer
+        than timeout. Inline streams run on the event loop and cannot be
+        interrupted.
+        """
+        if execution not in EXECUTION_CLASSES:
+            raise ValueError(f"Unknown execution class: {execution}")
+
+        if execution == "inline":
+            async with self._semaphore("inline"):
+                for item in call_project_function(module_name, module_path, function_name, parameters):
+                    yield item
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        queue: asyncio.Queue = asyncio.Queue()
+        slots = threading.Semaphore(STREAM_BUFFER)
+        # Also the generator's cancel_event, so a cooperative one stops early
+        stopped = threading.Event()
+
+        def send(kind: int, value: Any = None):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+            except RuntimeError:
+                stopped.set()  # Event loop closed
+
+        def produce():
+            items = None
+            try:
+                items = call_project_function(module_name, module_path, function_name, parameters, stopped)
+                for item in items:
+                    # Blocks while the consumer is STREAM_BUFFER items behind
+                    slots.acquire()
+                    if stopped.is_set():
+                        break
+                    send(_ITEM, item)
+            except Exception as e:
+                send(_ERROR, e)
+            finally:
+                if items is not None and hasattr(items, "close"):
+                    items.close()
+                send(_DONE)
+
+        async with self._semaphore("io"):
+            loop.run_in_executor(self._get_thread_pool(), produce)
+            try:
+                while True:
+                    remaining = None if deadline is None else max(deadline - loop.time(), 0)
+                    kind, value = await asyncio.wait_for(queue.get(), remaining)
+                    if kind == _DONE:
+                        break
+                    if kind == _ERROR:
+                        raise value
+                    slots.release()
+                    yield value
+            finally:
+                # Wake a blocked producer so it notices the consumer is gone
+                stopped.set()
+                slots.release()
+
+    def shutdown(self):
+        """Stop the worker pools"""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
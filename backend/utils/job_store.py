@@ -0,0 +1,437 @@
+"""
+Job record stores.
+
+Two implementations share the JobStore interface:
+
+- ``MemoryJobStore`` keeps records in the current process, for tests and
+  single-worker deployments.
+- ``SQLiteJobStore`` keeps records in a SQLite database in WAL mode, so every
+  worker process on a host sees the same jobs and history survives restarts.
+
+In both, finished jobs expire after a TTL and are evicted oldest first once
+the store exceeds its entry count or byte budget. Queued and running jobs are
+never evicted.
+"""
+
+import bisect
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+# Fixed overhead charged per record on top of its result and error payloads
+RECORD_OVERHEAD_BYTES = 512
+
+
+def estimate_size(job: Dict[str, Any]) -> int:
+    """Approximate the memory held by a job record"""
+    size = RECORD_OVERHEAD_BYTES
+    for key in ("result", "error"):
+        value = job.get(key)
+        if value is not None:
+            size += len(json.dumps(value, default=str))
+    return size
+
+
+class DuplicateIdempotencyKey(Exception):
+    """Raised when a job is created with an Idempotency-Key that is already stored."""
+
+
+def summarize(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a job record without its result payload, for listings"""
+    return {key: value for key, value in job.items() if key != "result"}
+
+
+class JobStore:
+    """Interface shared by the job store implementations."""
+
+    def create(self, job_id: str, job: Dict[str, Any]):
+        """Add a new job record
+
+        Raises DuplicateIdempotencyKey if the record's idempotency_key is
+        already in use.
+        """
+        raise NotImplementedError
+
+    def find_by_idempotency_key(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the job created with an Idempotency-Key, if it is still stored"""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job record, or None if it is unknown or expired"""
+        raise NotImplementedError
+
+    def update(self, job_id: str, **fields):
+        """Update fields of a job record; finished jobs become evictable"""
+        raise NotImplementedError
+
+    def delete(self, job_id: str) -> bool:
+        """Remove a job record, returning whether it existed"""
+        raise NotImplementedError
+
+    def list(self, status: Optional[str] = None, limit: int = 50,
+             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return a page of job summaries, newest first, and the next page's cursor"""
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """In-process job records with TTL, entry count and byte budget limits.
+
+    Eviction is least-recently-used: reading a finished job keeps it around.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        # Finished jobs in least-recently-used order
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        # (expires_at, job_id) heap; stale entries are skipped lazily
+        self._expiry: List[Tuple[float, str]] = []
+        # Creation sequence numbers for cursor pagination
+        self._seq = 0
+        self._order: List[int] = []
+        self._by_seq: Dict[int, str] = {}
+        self._idempotency_keys: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def create(self, job_id: str, job: Dict[str, Any]):
+        with self._lock:
+            key = job.get("idempotency_key")
+            if key is not None:
+                if key in self._idempotency_keys:
+                    raise DuplicateIdempotencyKey(key)
+                self._idempotency_keys[key] = job_id
+
+            self._seq += 1
+            self._jobs[job_id] = job
+            self._meta[job_id] = {"seq": self._seq, "size": 0, "expires_at": None}
+            self._order.append(self._seq)
+            self._by_seq[self._seq] = job_id
+            self._evict()
+
+    def find_by_idempotency_key(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job_id = self._idempotency_keys.get(key)
+            return self.get(job_id) if job_id is not None else None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            expires_at = self._meta[job_id]["expires_at"]
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(job_id)
+                return None
+
+            if job_id in self._lru:
+                self._lru.move_to_end(job_id)
+            return job
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return  # Deleted or evicted while running
+
+            job.update(fields)
+            if job.get("status") not in FINISHED_STATUSES:
+                return
+
+            meta = self._meta[job_id]
+            size = estimate_size(job)
+            self.total_bytes += size - meta["size"]
+            meta["size"] = size
+            meta["expires_at"] = time.monotonic() + self.ttl
+            heapq.heappush(self._expiry, (meta["expires_at"], job_id))
+            self._lru[job_id] = None
+            self._lru.move_to_end(job_id)
+            self._evict()
+
+    def delete(self, job_id: str) -> bool:
+        with self._lock:
+            if job_id not in self._jobs:
+                return False
+            self._remove(job_id)
+            return True
+
+    def list(self, status: Optional[str] = None, limit: int = 50,
+             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        with self._lock:
+            self._expire()
+            end = len(self._order)
+            if cursor is not None:
+                end = bisect.bisect_left(self._order, int(cursor))
+
+            page: List[Dict[str, Any]] = []
+            index = end - 1
+            while index >= 0 and len(page) < limit:
+                job_id = self._by_seq.get(self._order[index])
+                if job_id is not None:
+                    job = self._jobs[job_id]
+                    if status is None or job.get("status") == status:
+                        page.append(summarize(job))
+                index -= 1
+
+            has_more = index >= 0 and len(page) == limit
+            next_cursor = str(self._order[index + 1]) if has_more else None
+            return page, next_cursor
+
+    def _remove(self, job_id: str):
+        meta = self._meta.pop(job_id)
+        job = self._jobs.pop(job_id)
+        self._idempotency_keys.pop(job.get("idempotency_key"), None)
+        del self._by_seq[meta["seq"]]
+        self._lru.pop(job_id, None)
+        self.total_bytes -= meta["size"]
+
+        # Compact the sequence index once it is mostly tombstones
+        if len(self._order) > 64 and len(self._by_seq) < len(self._order) // 2:
+            self._order = [seq for seq in self._order if seq in self._by_seq]
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, job_id = heapq.heappop(self._expiry)
+            meta = self._meta.get(job_id)
+            if meta is not None and meta["expires_at"] == expires_at:
+                self._remove(job_id)
+
+    def _evict(self):
+        self._expire()
+        while self._lru and (len(self._jobs) > self.max_entries or self.total_bytes > self.max_bytes):
+            job_id, _ = self._lru.popitem(last=False)
+            self._remove(job_id)
+
+
+class SQLiteJobStore(JobStore):
+    """Job records in a SQLite database shared by all workers on a host.
+
+    Eviction is in completion order, since tracking reads would turn every
+    lookup into a write.
+    """
+
+    COLUMNS = (
+        "job_id", "project_id", "status", "created_at", "started_at", "finished_at",
+        "duration_ms", "result", "error", "idempotency_key", "request_fingerprint"
+    )
+
+    # How often, in seconds, expired and over-budget jobs are pruned
+    PRUNE_INTERVAL = 5.0
+
+    def __init__(self, path: str, ttl: float, max_entries: int, max_bytes: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._last_prune = 0.0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        with conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL UNIQUE,
+                    project_id TEXT,
+                    status TEXT NOT NULL,
+                    created_at TEXT,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    duration_ms REAL,
+                    result TEXT,
+                    error TEXT,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    expires_at REAL,
+                    idempotency_key TEXT,
+                    request_fingerprint TEXT
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, seq);
+                CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at);
+                CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+            """)
+
+            # Databases created before idempotency keys, and the fingerprints of the
+            # requests that used them, were stored lack the columns
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "idempotency_key" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN idempotency_key TEXT")
+            if "request_fingerprint" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN request_fingerprint TEXT")
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS jobs_idempotency_key ON jobs (idempotency_key) "
+                "WHERE idempotency_key IS NOT NULL"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        job = {column: row[column] for column in row.keys() if column in SQLiteJobStore.COLUMNS}
+        if job.get("result") is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def create(self, job_id: str, job: Dict[str, Any]):
+        values = dict(job, job_id=job_id)
+        values["result"] = None
+        columns = [column for column in self.COLUMNS if column in values]
+        insert = (
+            f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            [values[column] for column in columns]
+        )
+        key = values.get("idempotency_key")
+        try:
+            self._conn().execute(*insert)
+        except sqlite3.IntegrityError:
+            # An expired job keeps its key until it is pruned; take the key back from it
+            if key is None or not self._release_expired_key(key):
+                raise DuplicateIdempotencyKey(key)
+            try:
+                self._conn().execute(*insert)
+            except sqlite3.IntegrityError:
+                raise DuplicateIdempotencyKey(key)
+        self._prune()
+
+    def _release_expired_key(self, key: str) -> bool:
+        cursor = self._conn().execute(
+            "UPDATE jobs SET idempotency_key = NULL WHERE idempotency_key = ? AND expires_at <= ?",
+            (key, time.time())
+        )
+        return cursor.rowcount > 0
+
+    def find_by_idempotency_key(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT job_id FROM jobs WHERE idempotency_key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return self.get(row["job_id"]) if row is not None else None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            f"SELECT {', '.join(self.COLUMNS)}, expires_at FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row["expires_at"] is not None and row["expires_at"] <= time.time():
+            return None
+        return self._to_record(row)
+
+    def update(self, job_id: str, **fields):
+        values = {column: value for column, value in fields.items() if column in self.COLUMNS}
+        if "result" in values:
+            values["result"] = json.dumps(values["result"], default=str)
+
+        if fields.get("status") in FINISHED_STATUSES:
+            size = RECORD_OVERHEAD_BYTES
+            for key in ("result", "error"):
+                if values.get(key) is not None:
+                    size += len(values[key])
+            values["size"] = size
+            values["expires_at"] = time.time() + self.ttl
+
+        if not values:
+            return
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        self._conn().execute(
+            f"UPDATE jobs SET {assignments} WHERE job_id = ?", list(values.values()) + [job_id]
+        )
+        if "expires_at" in values:
+            self._prune()
+
+    def delete(self, job_id: str) -> bool:
+        cursor = self._conn().execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        return cursor.rowcount > 0
+
+    def list(self, status: Optional[str] = None, limit: int = 50,
+             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        conditions = ["(expires_at IS NULL OR expires_at > ?)"]
+        params: List[Any] = [time.time()]
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if cursor is not None:
+            conditions.append("seq < ?")
+            params.append(int(cursor))
+
+        columns = ", ".join(column for column in self.COLUMNS if column != "result")
+        rows = self._conn().execute(
+            f"SELECT seq, {columns} FROM jobs WHERE {' AND '.join(conditions)} "
+            f"ORDER BY seq DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        page = [self._to_record(row) for row in rows[:limit]]
+        next_cursor = str(rows[limit - 1]["seq"]) if len(rows) > limit else None
+        return page, next_cursor
+
+    def _prune(self):
+        # Throttled so the write path stays cheap; any worker may prune
+        now = time.time()
+        if now - self._last_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+
+            count, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM jobs"
+            ).fetchone()
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                return
+
+            # Evict finished jobs, oldest completion first, until within limits
+            finished = conn.execute(
+                "SELECT job_id, size FROM jobs WHERE expires_at IS NOT NULL ORDER BY expires_at"
+            )
+            evicted = []
+            for job_id, size in finished:
+                if count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                evicted.append((job_id,))
+                count -= 1
+                total_bytes -= size
+            conn.executemany("DELETE FROM jobs WHERE job_id = ?", evicted)
+
+
+def create_job_store(backend: str, path: str, ttl: float, max_entries: int,
+                     max_bytes: int) -> JobStore:
+    """Build the job store selected by configuration"""
+    if backend == "sqlite":
+        return SQLiteJobStore(path, ttl, max_entries, max_bytes)
+    if backend == "memory":
+        return MemoryJobStore(ttl, max_entries, max_bytes)
+    raise ValueError(f"Unknown job store backend: {backend}")
@@ -0,0 +1,64 @@
+"""
+Bounded worker queue for asynchronous project runs.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted to a full queue."""
+
+
+class JobQueue:
+    """Fixed set of worker tasks consuming a bounded queue of jobs."""
+
+    def __init__(self, workers: int, max_size: int):
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Spawn the worker tasks on the running event loop"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the worker tasks, dropping queued jobs"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, job: Callable[[], Awaitable[None]]):
+        """Queue a job coroutine factory, raising JobQueueFull when at capacity"""
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull("Job queue is full")
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await job()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Failures are recorded on the job itself; keep the worker alive
+                logger.exception("Job failed")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,85 @@
+"""
+Cached loading of project modules.
+
+Project modules are executed once and kept in memory, keyed by file path and
+modification time. A module is only re-executed when its source file changes,
+so repeated runs only pay for the function call itself.
+"""
+
+import importlib.util
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ProjectLoadError(Exception):
+    """Raised when a project module or function cannot be loaded."""
+
+
+class ModuleCache:
+    """Registry of loaded project modules keyed by path and mtime."""
+
+    def __init__(self):
+        # Called with (module_name, seconds) after each module load
+        self.on_load: Optional[Callable[[str, float], None]] = None
+        self._modules: Dict[str, Tuple[int, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _path_lock(self, module_path: str) -> threading.Lock:
+        with self._lock:
+            if module_path not in self._locks:
+                self._locks[module_path] = threading.Lock()
+            return self._locks[module_path]
+
+    def get_module(self, module_name: str, module_path: str) -> Any:
+        """Return the module at module_path, loading it only if it changed"""
+        try:
+            mtime = os.stat(module_path).st_mtime_ns
+        except OSError:
+            raise ProjectLoadError(f"Module {module_name} not found")
+
+        cached = self._modules.get(module_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        # Serialize loads per file so concurrent first calls import it once
+        with self._path_lock(module_path):
+            cached = self._modules.get(module_path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            spec = importlib.util.spec_from_file_location(module_name, module_path)
+            if spec is None or spec.loader is None:
+                raise ProjectLoadError(f"Module {module_name} could not be loaded")
+
+            started = time.perf_counter()
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            if self.on_load is not None:
+                self.on_load(module_name, time.perf_counter() - started)
+
+            self._modules[module_path] = (mtime, module)
+            return module
+
+    def get_function(self, module_name: str, module_path: str, function_name: str) -> Callable:
+        """Return a callable from a cached project module"""
+        module = self.get_module(module_name, module_path)
+
+        func = getattr(module, function_name, None)
+        if func is None:
+            raise ProjectLoadError(f"Function {function_name} not found in module")
+
+        return func
+
+    def invalidate(self, module_path: str = None):
+        """Drop one cached module, or all of them"""
+        with self._lock:
+            if module_path is None:
+                self._modules.clear()
+            else:
+                self._modules.pop(module_path, None)
+
+
+module_cache = ModuleCache()
@@ -0,0 +1,232 @@
+"""
+Pipelines: projects chained into a DAG that runs server-side.
+
+A pipeline is a list of steps. Each step runs one project and may take its
+``input`` from one earlier step, running once per item that step emits.
+Several steps may consume the same input. Parameter values of the form
+``"$.field.sub"`` are taken from the input item (``"$"`` is the whole item,
+and a leading ``"$$"`` escapes a literal dollar sign).
+
+What a step emits:
+
+- with ``"stream": true``, every item its project's stream function yields,
+  as it is yielded
+- with ``"each": "path"``, every element of the list at that path of its result
+- otherwise its result
+
+``"where": {"path": value}`` keeps only emitted items whose fields equal the
+given values. Steps are connected by bounded queues, so a downstream step
+starts on the first item while its input is still producing, and a slow step
+holds back the ones feeding it. Each step works on up to ``concurrency``
+items at a time.
+
+The runner has no web framework dependencies. It calls projects through the
+``run`` and ``stream`` callables it is given, which apply parameter
+validation and executor limits.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+# Items that may wait between two steps before the producing step blocks
+QUEUE_SIZE = 64
+
+# Item errors kept per step in the pipeline result
+MAX_STEP_ERRORS = 20
+
+_DONE = object()
+
+RunStep = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]
+StreamStep = Callable[[Dict[str, Any], Dict[str, Any]], AsyncIterator[Any]]
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline spec is invalid."""
+
+
+def resolve_path(item: Any, path: str) -> Any:
+    """Value at a dotted path ("links.0.url") of an item"""
+    value = item
+    for part in path.split(".") if path else []:
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            raise KeyError(f"Input item has no field {path}")
+    return value
+
+
+def is_reference(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith("$") and not value.startswith("$$")
+
+
+def map_parameters(parameters: Dict[str, Any], item: Any) -> Dict[str, Any]:
+    """Step parameters with "$" references replaced by fields of item"""
+    mapped = {}
+    for name, value in parameters.items():
+        if is_reference(value):
+            if value != "$" and not value.startswith("$."):
+                raise KeyError(f"Invalid reference {value}")
+            value = resolve_path(item, value[2:])
+        elif isinstance(value, str) and value.startswith("$$"):
+            value = value[1:]
+        mapped[name] = value
+    return mapped
+
+
+def matches(item: Any, where: Dict[str, Any]) -> bool:
+    """Whether item has the field values given in where"""
+    for path, expected in where.items():
+        try:
+            if resolve_path(item, path) != expected:
+                return False
+        except KeyError:
+            return False
+    return True
+
+
+def check_spec(steps: List[Dict[str, Any]], projects: Dict[str, Dict[str, Any]],
+               max_steps: int, max_concurrency: int):
+    """Raise PipelineError unless steps form a valid pipeline over projects"""
+    if not steps:
+        raise PipelineError("A pipeline needs at least one step")
+    if len(steps) > max_steps:
+        raise PipelineError(f"Pipeline exceeds {max_steps} steps")
+
+    seen = set()
+    for step in steps:
+        step_id = step["id"]
+        if step_id in seen:
+            raise PipelineError(f"Duplicate step id {step_id}")
+        # Inputs must come earlier, which also rules out cycles
+        if step.get("input") is not None and step["input"] not in seen:
+            raise PipelineError(f"Step {step_id}: input {step['input']} is not an earlier step")
+        seen.add(step_id)
+
+        project_config = projects.get(step["project_id"])
+        if project_config is None:
+            raise PipelineError(f"Step {step_id}: project {step['project_id']} not found")
+        if step.get("stream") and not project_config.get("stream_function"):
+            raise PipelineError(f"Step {step_id}: project {step['project_id']} cannot stream")
+        if step.get("stream") and step.get("each"):
+            raise PipelineError(f"Step {step_id}: use either stream or each")
+        if not 1 <= step.get("concurrency", 1) <= max_concurrency:
+            raise PipelineError(f"Step {step_id}: concurrency must be between 1 and {max_concurrency}")
+        if step.get("input") is None and any(is_reference(v) for v in step.get("parameters", {}).values()):
+            raise PipelineError(f"Step {step_id}: only steps with an input can use $ references")
+
+
+class Pipeline:
+    """One run of a pipeline spec."""
+
+    def __init__(self, steps: List[Dict[str, Any]], run: RunStep, stream: StreamStep,
+                 max_items: int, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.steps = steps
+        self._run = run
+        self._stream = stream
+        self.max_items = max_items
+        self.on_progress = on_progress
+        self.consumers: Dict[str, List[str]] = {step["id"]: [] for step in steps}
+        for step in steps:
+            if step.get("input") is not None:
+                self.consumers[step["input"]].append(step["id"])
+        self.queues: Dict[str, asyncio.Queue] = {
+            step["id"]: asyncio.Queue(QUEUE_SIZE) for step in steps if step.get("input") is not None
+        }
+        self.stats: Dict[str, Dict[str, Any]] = {
+            step["id"]: {
+                "project_id": step["project_id"], "started": 0, "completed": 0, "failed": 0,
+                "emitted": 0, "truncated": False, "errors": []
+            }
+            for step in steps
+        }
+        # Items emitted by steps nothing consumes
+        self.outputs: Dict[str, List[Any]] = {
+            step_id: [] for step_id, consumers in self.consumers.items() if not consumers
+        }
+
+    def progress(self) -> Dict[str, Any]:
+        return {"steps": self.stats}
+
+    def _changed(self):
+        if self.on_progress is not None:
+            self.on_progress(self.progress())
+
+    async def _emit(self, step: Dict[str, Any], item: Any) -> bool:
+        """Pass an item on; returns False once the step hit the item limit"""
+        stats = self.stats[step["id"]]
+        if not matches(item, step.get("where", {})):
+            return True
+        if stats["emitted"] >= self.max_items:
+            stats["truncated"] = True
+            return False
+        stats["emitted"] += 1
+        if step["id"] in self.outputs:
+            self.outputs[step["id"]].append(item)
+        for consumer in self.consumers[step["id"]]:
+            await self.queues[consumer].put(item)
+        return True
+
+    async def _process(self, step: Dict[str, Any], item: Any) -> bool:
+        """Run a step on one input item and emit what it produces"""
+        stats = self.stats[step["id"]]
+        stats["started"] += 1
+        try:
+            parameters = map_parameters(step.get("parameters", {}), item)
+            if step.get("stream"):
+                async for produced in self._stream(step, parameters):
+                    if not await self._emit(step, produced):
+                        break
+            else:
+                result = await self._run(step, parameters)
+                produced = resolve_path(result, step["each"]) if step.get("each") else [result]
+                for element in produced if isinstance(produced, list) else [produced]:
+                    if not await self._emit(step, element):
+                        break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats["failed"] += 1
+            if len(stats["errors"]) < MAX_STEP_ERRORS:
+                stats["errors"].append(str(e) or type(e).__name__)
+            return False
+        finally:
+            self._changed()
+        stats["completed"] += 1
+        return True
+
+    async def _run_step(self, step: Dict[str, Any]):
+        try:
+            if step.get("input") is None:
+                await self._process(step, None)
+                return
+
+            queue = self.queues[step["id"]]
+
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is _DONE:
+                        # Leave it for the step's other workers
+                        queue.put_nowait(_DONE)
+                        return
+                    # Past the item limit the input is only drained, so its producer is not stuck
+                    if not self.stats[step["id"]]["truncated"]:
+                        await self._process(step, item)
+
+            await asyncio.gather(*(worker() for _ in range(step.get("concurrency", 1))))
+        finally:
+            # Downstream steps finish once they have drained their queue
+            for consumer in self.consumers[step["id"]]:
+                await self.queues[consumer].put(_DONE)
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every step to completion and return the outputs and step stats"""
+        tasks = [asyncio.ensure_future(self._run_step(step)) for step in self.steps]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return {"outputs": self.outputs, **self.progress()}
@@ -0,0 +1,228 @@
+"""
+Registry of the projects available in backend/projects.
+
+Each project module declares itself with a module-level ``PROJECT`` dict
+literal (id, name, description, category, function and optional settings
+such as ``execution``). The registry reads these with ``ast`` instead of
+importing the modules, checks that the declared functions exist, derives a
+parameter schema from the function signature when ``parameters`` is not
+given, and records each file's hash.
+
+The result is kept in a JSON manifest on disk. On startup only files whose
+size or mtime changed are parsed again, so startup stays fast as the number
+of projects grows. Modules themselves are imported lazily by the module
+cache on their first call.
+"""
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from utils.settings import PROJECT_MANIFEST_PATH, PROJECTS_DIR
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+
+# Python annotations mapped to the parameter types the frontend renders
+ANNOTATION_TYPES = {
+    "str": "string",
+    "int": "integer",
+    "float": "number",
+    "bool": "boolean",
+    "list": "array",
+    "List": "array",
+    "dict": "object",
+    "Dict": "object",
+}
+
+
+def _annotation_type(annotation: Optional[ast.expr]) -> str:
+    if annotation is None:
+        return "string"
+    if isinstance(annotation, ast.Subscript):
+        annotation = annotation.value
+        if isinstance(annotation, ast.Name) and annotation.id == "Optional":
+            return "string"
+    name = annotation.id if isinstance(annotation, ast.Name) else getattr(annotation, "attr", "")
+    return ANNOTATION_TYPES.get(name, "string")
+
+
+def signature_parameters(func: ast.FunctionDef) -> List[Dict[str, Any]]:
+    """Parameter schema of a function from its annotations and defaults"""
+    args = func.args.args
+    defaults = [None] * (len(args) - len(func.args.defaults)) + list(func.args.defaults)
+    parameters = []
+    for arg, default in zip(args, defaults):
+        if arg.arg in ("cancel_event", "artifacts"):
+            continue
+        parameter = {"name": arg.arg, "type": _annotation_type(arg.annotation), "description": ""}
+        if default is not None:
+            try:
+                parameter["default"] = ast.literal_eval(default)
+            except ValueError:
+                pass  # Not a literal; leave it to the function
+        parameters.append(parameter)
+    return parameters
+
+
+def scan_module(module_path: str, source: bytes) -> Dict[str, Dict[str, Any]]:
+    """Read the PROJECT declaration of one module without importing it"""
+    module_name = os.path.splitext(os.path.basename(module_path))[0]
+    tree = ast.parse(source, filename=module_path)
+
+    functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+    declaration = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "PROJECT" for target in node.targets
+        ):
+            declaration = ast.literal_eval(node.value)
+    if declaration is None:
+        return {}
+
+    config = dict(declaration)
+    project_id = config.pop("id", module_name)
+    config["module"] = module_name
+    for key in ("function", "stream_function"):
+        if key in config and config[key] not in functions:
+            logger.warning("Skipping project %s: %s %s not found in %s",
+                           project_id, key, config[key], module_path)
+            return {}
+    if "function" not in config:
+        logger.warning("Skipping project %s: no function declared in %s", project_id, module_path)
+        return {}
+    if "parameters" not in config:
+        config["parameters"] = signature_parameters(functions[config["function"]])
+
+    return {project_id: config}
+
+
+class ProjectRegistry:
+    """Manifest of project modules, rebuilt incrementally from their sources."""
+
+    def __init__(self, projects_dir: str, manifest_path: Optional[str] = None):
+        self.projects_dir = projects_dir
+        self.manifest_path = manifest_path
+        self._projects: Optional[Dict[str, Dict[str, Any]]] = None
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not self.manifest_path:
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest.get("files", {})
+
+    def _write_manifest(self):
+        if not self.manifest_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "files": self._files}, f)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            # A read-only deployment still works, it just rescans on start
+            logger.warning("Could not write project manifest: %s", e)
+
+    def _scan(self) -> Dict[str, Dict[str, Any]]:
+        cached = self._read_manifest()
+        files: Dict[str, Dict[str, Any]] = {}
+        changed = False
+
+        with os.scandir(self.projects_dir) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if not entry.name.endswith(".py") or entry.name.startswith("_") or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                previous = cached.get(entry.name)
+                if previous and previous["mtime_ns"] == stat.st_mtime_ns and previous["size"] == stat.st_size:
+                    files[entry.name] = previous
+                    continue
+
+                with open(entry.path, "rb") as f:
+                    source = f.read()
+                digest = hashlib.sha256(source).hexdigest()
+                if previous and previous["hash"] == digest:
+                    projects = previous["projects"]
+                else:
+                    try:
+                        projects = scan_module(entry.path, source)
+                    except (SyntaxError, ValueError) as e:
+                        logger.warning("Skipping %s: %s", entry.path, e)
+                        projects = {}
+                files[entry.name] = {
+                    "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hash": digest, "projects": projects
+                }
+                changed = True
+
+        self._files = files
+        self._version = hashlib.sha256(
+            "".join(f"{name}:{entry['hash']}\n" for name, entry in files.items()).encode()
+        ).hexdigest()
+        if changed or files.keys() != cached.keys():
+            self._write_manifest()
+
+        projects: Dict[str, Dict[str, Any]] = {}
+        for file_name, entry in files.items():
+            for project_id, config in entry["projects"].items():
+                if project_id in projects:
+                    logger.warning("Duplicate project id %s in %s", project_id, file_name)
+                    continue
+                projects[project_id] = config
+        return projects
+
+    @property
+    def projects(self) -> Dict[str, Dict[str, Any]]:
+        """Project configurations keyed by id, scanned on first access"""
+        if self._projects is None:
+            with self._lock:
+                if self._projects is None:
+                    self._projects = self._scan()
+        return self._projects
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """Rescan the projects directory, reparsing only changed files"""
+        with self._lock:
+            self._projects = self._scan()
+        return self._projects
+
+    @property
+    def version(self) -> str:
+        """Digest of all scanned sources; changes whenever any project file does"""
+        self.projects
+        return self._version
+
+    def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        return self.projects.get(project_id)
+
+    def categories(self) -> List[str]:
+        """Sorted unique project categories"""
+        return sorted({config.get("category", "Other") for config in self.projects.values()})
+
+    def module_path(self, project_id: str) -> str:
+        """Absolute path of a project's module file"""
+        return os.path.join(self.projects_dir, f"{self.projects[project_id]['module']}.py")
+
+    def file_hash(self, project_id: str) -> Optional[str]:
+        """sha256 of the module file a project was declared in"""
+        module = self.projects[project_id]["module"]
+        entry = self._files.get(f"{module}.py")
+        return entry["hash"] if entry else None
+
+
+# Shared by the FastAPI app, the projects package and the serverless handlers
+registry = ProjectRegistry(PROJECTS_DIR, PROJECT_MANIFEST_PATH or None)
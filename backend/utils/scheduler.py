@@ -0,0 +1,448 @@
+"""
+Recurring project runs on cron expressions or fixed intervals.
+
+All schedules share one heap of due times, served by a single asyncio task
+that sleeps until the earliest one, so thousands of idle schedules cost
+nothing but their heap entries. Due runs are handed to a ``submit`` callable,
+which queues them as ordinary jobs.
+
+Each schedule has:
+
+- ``cron`` (five fields, minute to weekday, evaluated in ``timezone``) or
+  ``interval`` (seconds, at a fixed rate from the schedule's creation)
+- ``jitter``: up to this many seconds of random delay per run, so schedules
+  sharing a time do not all fire at once
+- ``missed``: what happens to a run that fires more than the misfire grace
+  period late (after a restart or a stall). ``run_once`` runs it once, however
+  many occurrences were missed. ``skip`` records it as missed and waits for the
+  next occurrence.
+
+Schedules and their recent history are saved to a JSON file, so they survive
+restarts and runs missed while the process was down are detected. When
+several processes share the file, only the one holding a lock next to it
+fires schedules and should change them; the others read the file through
+``reload`` and take over the lock when its holder exits. Saving merges with
+the file rather than overwriting it, so entries another process wrote are
+kept.
+"""
+
+import asyncio
+import calendar
+import functools
+import heapq
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MISSED_POLICIES = ("run_once", "skip")
+
+# Longest the timer sleeps, so wall clock jumps and suspends are noticed
+MAX_SLEEP = 60.0
+
+# Changes are written to disk at most this often
+FLUSH_INTERVAL = 5.0
+
+CRON_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = {name.lower(): i for i, name in enumerate(calendar.month_abbr) if name}
+DAY_NAMES = {name: i for i, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+
+
+class ScheduleError(ValueError):
+    """Raised for an invalid schedule spec."""
+
+
+def _parse_field(field: str, low: int, high: int, names: Optional[Dict[str, int]] = None) -> Set[int]:
+    values: Set[int] = set()
+    for part in field.lower().split(","):
+        part, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ScheduleError(f"Invalid step in cron field {field!r}")
+        if part == "*":
+            start, end = low, high
+        else:
+            first, _, last = part.partition("-")
+            start = names[first] if names and first in names else int(first)
+            end = (names[last] if names and last in names else int(last)) if last else (high if step_text else start)
+        if not low <= start <= end <= high:
+            raise ScheduleError(f"Cron field {field!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """A standard five-field cron expression."""
+
+    def __init__(self, expression: str):
+        expression = CRON_MACROS.get(expression.strip(), expression)
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ScheduleError("Cron expressions have five fields: minute hour day month weekday")
+        try:
+            self.minutes = _parse_field(fields[0], 0, 59)
+            self.hours = _parse_field(fields[1], 0, 23)
+            self.days = _parse_field(fields[2], 1, 31)
+            self.months = _parse_field(fields[3], 1, 12, MONTH_NAMES)
+            # 0 and 7 are both Sunday
+            self.weekdays = {day % 7 for day in _parse_field(fields[4], 0, 7, DAY_NAMES)}
+        except (KeyError, ValueError) as e:
+            raise ScheduleError(f"Invalid cron expression {expression!r}: {e}")
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day = dt.day in self.days
+        weekday = (dt.weekday() + 1) % 7 in self.weekdays
+        # As in cron, a restricted day of month and weekday match if either does
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, dt: datetime) -> datetime:
+        """First matching minute after dt (naive wall clock time)"""
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Four years covers every valid combination, including 29 February
+        limit = dt + timedelta(days=366 * 4 + 1)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ScheduleError("Cron expression never matches")
+
+
+@functools.lru_cache(maxsize=1024)
+def _cron(expression: str) -> CronExpression:
+    return CronExpression(expression)
+
+
+def _timezone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ScheduleError(f"Unknown time zone {name}")
+
+
+def next_run(schedule: Dict[str, Any], after: float) -> float:
+    """Timestamp of the schedule's first occurrence after the timestamp after"""
+    interval = schedule.get("interval")
+    if interval:
+        anchor = schedule["created_at"]
+        if after < anchor:
+            return anchor + interval
+        return anchor + (int((after - anchor) // interval) + 1) * interval
+
+    tz = _timezone(schedule.get("timezone", "UTC"))
+    cron = _cron(schedule["cron"])
+    wall = datetime.fromtimestamp(after, tz).replace(tzinfo=None)
+    while True:
+        wall = cron.next_after(wall)
+        # Wall time only moves forward, so the hour repeated when clocks go
+        # back runs once: in its first pass, or in the second if after is
+        # there already. A time skipped when they go forward runs after the gap
+        instants = {wall.replace(tzinfo=tz, fold=fold).timestamp() for fold in (0, 1)}
+        real = {t for t in instants if datetime.fromtimestamp(t, tz).replace(tzinfo=None) == wall}
+        later = [t for t in real or {wall.replace(tzinfo=tz).timestamp()} if t > after]
+        if later:
+            return min(later)
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class Scheduler:
+    """Recurring schedules fired from a single timer heap."""
+
+    def __init__(self, submit: Callable[[Dict[str, Any]], str], path: Optional[str] = None,
+                 history_size: int = 50, misfire_grace: float = 60, max_schedules: int = 10000):
+        self.submit = submit
+        self.path = path
+        self.history_size = history_size
+        self.misfire_grace = misfire_grace
+        self.max_schedules = max_schedules
+        self.on_fire: Optional[Callable[[str, str], None]] = None
+        self._schedules: Dict[str, Dict[str, Any]] = {}
+        self._history: Dict[str, deque] = {}
+        # (due, sequence, schedule id, version); stale entries are skipped when popped
+        self._heap: List[tuple] = []
+        self._sequence = 0
+        self._versions: Dict[str, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._flushed = 0.0
+        # Schedules removed since the last save, so merging does not bring them back
+        self._removed: Set[str] = set()
+        # Open while this process holds the lock that makes it fire the schedules
+        self._lock_file = None
+        self._leader = False
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    @property
+    def running(self) -> bool:
+        """Whether this process fires the schedules"""
+        return self._task is not None and self._leader
+
+    def _take_lock(self) -> bool:
+        """Take the lock on the schedules file without waiting; true once held"""
+        if self._leader:
+            return True
+        if self.path and fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                lock_file = open(f"{self.path}.lock", "a")
+            except OSError as e:
+                logger.warning("Could not open the schedules lock: %s", e)
+                return False
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+        # Without a file, or without flock, this process is assumed to be the only one
+        self._leader = True
+        return True
+
+    def _release_lock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self._leader = False
+
+    def _read(self) -> List[Dict[str, Any]]:
+        """Entries saved in the file, or none if it is missing or unreadable"""
+        if not self.path:
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("schedules", [])
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load schedules from %s: %s", self.path, e)
+            return []
+
+    def _load(self):
+        for entry in self._read():
+            schedule = entry["schedule"]
+            self._schedules[schedule["id"]] = schedule
+            self._history[schedule["id"]] = deque(entry.get("history", []), self.history_size)
+            # A next_run_at in the past is handled by the missed run policy
+            self._push(schedule)
+
+    def reload(self):
+        """Replace the schedules with the saved ones, in a process not running them"""
+        if self.running:
+            return
+        self._reload()
+
+    def _reload(self):
+        self._schedules.clear()
+        self._history.clear()
+        self._heap.clear()
+        self._versions.clear()
+        self._load()
+
+    def _flush(self):
+        if not self.path:
+            return
+        self._dirty = False
+        self._flushed = time.monotonic()
+        # Keep what other processes saved, except schedules removed here
+        saved = {"schedules": [
+            entry for entry in self._read()
+            if entry["schedule"]["id"] not in self._schedules and entry["schedule"]["id"] not in self._removed
+        ] + [
+            {"schedule": schedule, "history": list(self._history[schedule_id])}
+            for schedule_id, schedule in self._schedules.items()
+        ]}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(saved, f)
+            os.replace(tmp_path, self.path)
+            self._removed.clear()
+        except OSError as e:
+            logger.warning("Could not save schedules: %s", e)
+
+    def _push(self, schedule: Dict[str, Any]):
+        version = self._versions.get(schedule["id"], 0) + 1
+        self._versions[schedule["id"]] = version
+        due = schedule["next_run_at"] + random.uniform(0, schedule.get("jitter", 0))
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, schedule["id"], version))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def add(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a schedule from a spec and return it"""
+        if len(self._schedules) >= self.max_schedules:
+            raise ScheduleError(f"Limit of {self.max_schedules} schedules reached")
+        if bool(spec.get("cron")) == bool(spec.get("interval")):
+            raise ScheduleError("Give either cron or interval")
+        if spec.get("missed", "run_once") not in MISSED_POLICIES:
+            raise ScheduleError(f"missed must be one of {', '.join(MISSED_POLICIES)}")
+
+        now = time.time()
+        schedule = {
+            "id": spec.get("id") or str(uuid.uuid4()),
+            "project_id": spec["project_id"],
+            "parameters": spec.get("parameters", {}),
+            "cron": spec.get("cron"),
+            "interval": spec.get("interval"),
+            "timezone": spec.get("timezone", "UTC"),
+            "jitter": spec.get("jitter", 0),
+            "missed": spec.get("missed", "run_once"),
+            "timeout": spec.get("timeout"),
+            "created_at": now,
+            "last_run_at": None,
+            "runs": 0,
+        }
+        if schedule["id"] in self._schedules:
+            raise ScheduleError(f"Schedule {schedule['id']} already exists")
+        schedule["next_run_at"] = next_run(schedule, now)
+
+        self._schedules[schedule["id"]] = schedule
+        self._history[schedule["id"]] = deque(maxlen=self.history_size)
+        self._push(schedule)
+        self._dirty = True
+        return schedule
+
+    def remove(self, schedule_id: str) -> bool:
+        """Delete a schedule; its heap entry is dropped when it comes due"""
+        if self._schedules.pop(schedule_id, None) is None:
+            return False
+        self._history.pop(schedule_id, None)
+        self._versions.pop(schedule_id, None)
+        self._removed.add(schedule_id)
+        self._dirty = True
+        return True
+
+    def get(self, schedule_id: str) -> Optional[Dict[str, Any]]:
+        return self._schedules.get(schedule_id)
+
+    def history(self, schedule_id: str) -> List[Dict[str, Any]]:
+        """Recent runs of a schedule, newest first"""
+        return list(reversed(self._history.get(schedule_id, ())))
+
+    def list(self) -> List[Dict[str, Any]]:
+        return list(self._schedules.values())
+
+    def describe(self, schedule: Dict[str, Any]) -> Dict[str, Any]:
+        """A schedule with its timestamps as ISO 8601 strings"""
+        return {
+            key: _isoformat(value) if key.endswith("_at") and value is not None else value
+            for key, value in schedule.items()
+        }
+
+    def _fire(self, schedule: Dict[str, Any], due: float, now: float):
+        entry = {
+            "scheduled_for": _isoformat(schedule["next_run_at"]), "fired_at": _isoformat(now), "job_id": None
+        }
+        if now - due > self.misfire_grace and schedule["missed"] == "skip":
+            entry["status"] = "missed"
+        else:
+            try:
+                entry["job_id"] = self.submit(schedule)
+                entry["status"] = "queued"
+                schedule["runs"] += 1
+                schedule["last_run_at"] = now
+            except Exception as e:
+                entry["status"] = "rejected"
+                entry["error"] = str(e)
+        self._history[schedule["id"]].append(entry)
+        if self.on_fire is not None:
+            self.on_fire(schedule["project_id"], entry["status"])
+
+        # Missed occurrences collapse into the run above
+        schedule["next_run_at"] = next_run(schedule, max(now, schedule["next_run_at"]))
+        self._push(schedule)
+        self._dirty = True
+
+    async def _run(self):
+        while True:
+            if not self._leader:
+                if not self._take_lock():
+                    await asyncio.sleep(MAX_SLEEP)
+                    continue
+                # Start from what the previous holder saved
+                self._reload()
+
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, schedule_id, version = heapq.heappop(self._heap)
+                schedule = self._schedules.get(schedule_id)
+                if schedule is None or self._versions.get(schedule_id) != version:
+                    continue
+                try:
+                    self._fire(schedule, due, now)
+                except Exception:
+                    logger.exception("Schedule %s failed to fire", schedule_id)
+
+            if self._dirty and time.monotonic() - self._flushed >= FLUSH_INTERVAL:
+                self._flush()
+
+            delay = MAX_SLEEP
+            if self._heap:
+                delay = min(delay, max(self._heap[0][0] - time.time(), 0))
+            if self._dirty:
+                delay = min(delay, FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the timer task on the running event loop"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the timer task and save the schedules"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._dirty and self._leader:
+            self._flush()
+        self._release_lock()
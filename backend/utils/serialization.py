@@ -0,0 +1,59 @@
+"""
+JSON encoding for run responses.
+
+orjson is used when it is installed and TOOLKIT_JSON_ENCODER allows it. It
+is several times faster than the stdlib on the large results some projects
+return (base64 images, hundreds of link dicts). Anything orjson refuses,
+such as integers wider than 64 bits, falls back to the stdlib encoder.
+Both write NaN and infinities as null, as orjson does, rather than the
+stdlib's NaN and Infinity, which are not valid JSON.
+"""
+
+import json
+import math
+from typing import Any
+
+from utils.settings import JSON_ENCODER
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if JSON_ENCODER == "stdlib":
+    orjson = None
+
+ENCODER = "orjson" if orjson is not None else "stdlib"
+
+
+def _finite(obj: Any) -> Any:
+    """obj with NaN and infinite floats replaced by None"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(item) for item in obj]
+    return obj
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(
+        obj, separators=(",", ":"), ensure_ascii=False, default=str, allow_nan=False
+    ).encode("utf-8")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj to compact UTF-8 JSON, stringifying unknown types"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # Not representable by orjson; use the stdlib
+    try:
+        return _stdlib_dumps(obj)
+    except ValueError as e:
+        if "Out of range float" not in str(e):
+            raise  # A circular reference
+        # Rare, so the result is only copied when it holds such a float
+        return _stdlib_dumps(_finite(obj))
@@ -0,0 +1,129 @@
+"""
+Runtime settings for the backend, read from environment variables.
+"""
+
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting, falling back to default when unset or invalid"""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting, falling back to default when unset or invalid"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Maximum number of concurrent runs per execution class
+EXECUTION_LIMITS = {
+    "inline": env_int("TOOLKIT_INLINE_CONCURRENCY", 32),
+    "io": env_int("TOOLKIT_IO_WORKERS", 16),
+    "cpu": env_int("TOOLKIT_CPU_WORKERS", os.cpu_count() or 2),
+}
+
+# Execution class used by projects that do not declare one
+DEFAULT_EXECUTION = os.environ.get("TOOLKIT_DEFAULT_EXECUTION", "io")
+
+# Workers and queue capacity for ?async=true runs
+JOB_WORKERS = env_int("TOOLKIT_JOB_WORKERS", 8)
+JOB_QUEUE_SIZE = env_int("TOOLKIT_JOB_QUEUE_SIZE", 1000)
+
+# Retention limits for finished job records
+JOB_TTL_SECONDS = env_int("TOOLKIT_JOB_TTL_SECONDS", 3600)
+JOB_MAX_ENTRIES = env_int("TOOLKIT_JOB_MAX_ENTRIES", 10000)
+JOB_MAX_BYTES = env_int("TOOLKIT_JOB_MAX_BYTES", 64 * 1024 * 1024)
+
+# Project modules, and the manifest the registry caches their declarations in
+PROJECTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "projects")
+PROJECT_MANIFEST_PATH = os.environ.get(
+    "TOOLKIT_PROJECT_MANIFEST",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "manifest.json")
+)
+
+# Seconds clients may reuse the /projects catalog before revalidating it
+CATALOG_MAX_AGE = env_int("TOOLKIT_CATALOG_MAX_AGE", 60)
+
+# Largest request body the serverless run handler accepts, and seconds a
+# client may stall while sending it before the connection is dropped
+RUN_MAX_BODY_BYTES = env_int("TOOLKIT_RUN_MAX_BODY_BYTES", 1024 * 1024)
+RUN_READ_TIMEOUT = env_float("TOOLKIT_RUN_READ_TIMEOUT", 10)
+
+# Job store backend: "memory" (single process) or "sqlite" (shared by workers)
+JOB_STORE = os.environ.get("TOOLKIT_JOB_STORE", "memory")
+JOB_DB_PATH = os.environ.get(
+    "TOOLKIT_JOB_DB", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "jobs.db")
+)
+
+# Result cache for projects marked "cacheable"; an empty directory disables the disk tier
+RESULT_CACHE_SIZE = env_int("TOOLKIT_RESULT_CACHE_SIZE", 1024)
+RESULT_CACHE_DIR = os.environ.get("TOOLKIT_RESULT_CACHE_DIR", "")
+RESULT_CACHE_TTL = env_int("TOOLKIT_RESULT_CACHE_TTL", 86400)
+
+# Maximum parameter sets accepted by /projects/{project_id}/run_batch
+BATCH_MAX_ITEMS = env_int("TOOLKIT_BATCH_MAX_ITEMS", 1000)
+
+# Pipelines (POST /pipelines): steps per pipeline, concurrency per step, and
+# items each step may emit
+PIPELINE_MAX_STEPS = env_int("TOOLKIT_PIPELINE_MAX_STEPS", 20)
+PIPELINE_MAX_CONCURRENCY = env_int("TOOLKIT_PIPELINE_MAX_CONCURRENCY", 16)
+PIPELINE_MAX_ITEMS = env_int("TOOLKIT_PIPELINE_MAX_ITEMS", 1000)
+
+# Project run timeouts in seconds; projects may set their own "timeout"
+DEFAULT_TIMEOUT = env_int("TOOLKIT_DEFAULT_TIMEOUT", 60)
+MAX_TIMEOUT = env_int("TOOLKIT_MAX_TIMEOUT", 600)
+
+# How long DELETE /jobs/{job_id} waits for a running job to stop
+CANCEL_GRACE_SECONDS = env_int("TOOLKIT_CANCEL_GRACE_SECONDS", 5)
+# How often a worker checks whether jobs it runs were deleted through another
+# worker (SQLite job store only)
+CANCEL_POLL_SECONDS = env_float("TOOLKIT_CANCEL_POLL_SECONDS", 1)
+
+# Admission control per client IP for the run endpoints; 0 disables a limit.
+# Projects set their own "rate_limit" and "max_concurrency".
+CLIENT_RATE = env_float("TOOLKIT_CLIENT_RATE", 10)
+CLIENT_BURST = env_int("TOOLKIT_CLIENT_BURST", 20)
+CLIENT_CONCURRENCY = env_int("TOOLKIT_CLIENT_CONCURRENCY", 8)
+ADMISSION_QUEUE_SIZE = env_int("TOOLKIT_ADMISSION_QUEUE_SIZE", 16)
+ADMISSION_QUEUE_TIMEOUT = env_float("TOOLKIT_ADMISSION_QUEUE_TIMEOUT", 2)
+
+# Take the client IP from X-Forwarded-For; only enable behind a trusted proxy
+TRUST_PROXY_HEADERS = os.environ.get("TOOLKIT_TRUST_PROXY_HEADERS", "").lower() in ("1", "true", "yes")
+
+# cpu worker processes are recycled after this many jobs or once their peak
+# memory passes the threshold, and run under optional resource limits; 0 disables
+WORKER_MAX_JOBS = env_int("TOOLKIT_WORKER_MAX_JOBS", 500)
+WORKER_MAX_RSS_MB = env_int("TOOLKIT_WORKER_MAX_RSS_MB", 512)
+WORKER_MEMORY_LIMIT_MB = env_int("TOOLKIT_WORKER_MEMORY_LIMIT_MB", 2048)
+WORKER_CPU_LIMIT_SECONDS = env_int("TOOLKIT_WORKER_CPU_LIMIT_SECONDS", 0)
+
+# Response bodies of at least this many bytes are gzip/brotli compressed; 0 disables
+COMPRESS_MIN_SIZE = env_int("TOOLKIT_COMPRESS_MIN_SIZE", 1024)
+COMPRESS_LEVEL = env_int("TOOLKIT_COMPRESS_LEVEL", 6)
+
+# JSON encoder for run responses: "auto" uses orjson when installed, "stdlib" never does
+JSON_ENCODER = os.environ.get("TOOLKIT_JSON_ENCODER", "auto")
+
+# Content-addressed store for binary project outputs, evicted least recently
+# used first once it grows past the budget; 0 disables eviction
+ARTIFACT_DIR = os.environ.get(
+    "TOOLKIT_ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "artifacts")
+)
+ARTIFACT_MAX_MB = env_int("TOOLKIT_ARTIFACT_MAX_MB", 512)
+
+# Recurring schedules (/schedules). Of several API workers only the one holding
+# the lock on the schedules file fires them; 0 keeps this process out entirely
+SCHEDULER_ENABLED = os.environ.get("TOOLKIT_SCHEDULER", "1").lower() not in ("0", "false", "no")
+SCHEDULES_PATH = os.environ.get(
+    "TOOLKIT_SCHEDULES_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "schedules.json")
+)
+SCHEDULE_MAX = env_int("TOOLKIT_SCHEDULE_MAX", 10000)
+SCHEDULE_HISTORY = env_int("TOOLKIT_SCHEDULE_HISTORY", 50)
+# Runs firing later than this many seconds count as missed
+SCHEDULE_MISFIRE_GRACE = env_int("TOOLKIT_SCHEDULE_MISFIRE_GRACE", 60)
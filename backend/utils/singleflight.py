@@ -0,0 +1,80 @@
+"""
+Single-flight deduplication of identical in-flight calls.
+
+Concurrent calls with the same key share one execution: the first caller
+starts the work in a task of its own and every caller awaits its outcome. A
+caller that is cancelled detaches without affecting the others, and the
+work is only cancelled once its last caller has gone.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SharedCallCancelled(Exception):
+    """Raised in waiters when the call they joined was cancelled."""
+
+
+class _Call:
+    """One shared execution and the number of callers awaiting it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent coroutine calls that share a key."""
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self._calls: Dict[str, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func for key, or wait for the run already in flight"""
+        call = self._calls.get(key)
+        if call is None:
+            # The work runs in its own task, so no single caller owns it
+            call = _Call(asyncio.ensure_future(func()))
+            # Mark the outcome as retrieved even when every caller has left
+            call.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self._calls[key] = call
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # Shielded so a caller giving up only detaches from the shared run
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.task.cancelled():
+                # The run itself was cancelled, not this caller
+                raise SharedCallCancelled("The shared run was cancelled")
+            raise
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody wants the result any more; later callers start afresh
+                self._forget(key, call)
+                call.task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        """Execution and coalescing counters"""
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,104 @@
+"""
+Validation of project parameters before anything is imported or dispatched.
+
+A pydantic model is compiled once per project from the ``parameters`` list
+in its declaration. Each entry's ``type`` picks the field type, ``default``
+makes it optional, and the optional ``min``/``max`` (numbers),
+``min_length``/``max_length`` (strings and arrays) and ``options`` (allowed
+values) keys add bounds. Unknown parameters are rejected, and defaults are
+filled in, so every run of a project sees its parameters in the same shape.
+"""
+
+import threading
+from typing import Any, Dict, List, Literal, Optional, Tuple, Type, Union
+
+from pydantic import (
+    BaseModel, ConfigDict, Field, StrictBool, StrictFloat, StrictInt, ValidationError, create_model
+)
+
+# Strict types, so true is not taken for 1 nor 12.5 for a count; JSON has
+# no separate integer type, so counts and sizes must be declared "integer"
+PARAMETER_TYPES = {
+    "string": str,
+    # Whole numbers stay ints, so functions can use them with range() and friends
+    "number": Union[StrictInt, StrictFloat],
+    "integer": StrictInt,
+    "boolean": StrictBool,
+    "array": list,
+    "object": dict,
+    "file": str,
+}
+
+BOUND_KEYS = {"min": "ge", "max": "le", "min_length": "min_length", "max_length": "max_length"}
+
+
+class ParameterError(Exception):
+    """Raised when project parameters do not match the project's schema."""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__("; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in errors))
+        self.errors = errors
+
+
+def build_model(project_id: str, parameters: List[Dict[str, Any]]) -> Type[BaseModel]:
+    """Compile a project's parameter specs into a pydantic model"""
+    fields: Dict[str, Tuple[Any, Any]] = {}
+    for index, spec in enumerate(parameters):
+        annotation = PARAMETER_TYPES.get(spec.get("type", "string"), Any)
+        if spec.get("options"):
+            annotation = Literal[tuple(spec["options"])]
+
+        bounds = {BOUND_KEYS[key]: spec[key] for key in BOUND_KEYS if key in spec}
+        default = spec["default"] if "default" in spec else ...
+        if default is None:
+            annotation = Optional[annotation]
+        # Field names are positional so parameter names can never clash with
+        # BaseModel attributes; the real name is the alias
+        fields[f"p{index}"] = (
+            annotation, Field(default, alias=spec["name"], description=spec.get("description"), **bounds)
+        )
+
+    return create_model(
+        f"{project_id}_parameters",
+        __config__=ConfigDict(extra="forbid", populate_by_name=False),
+        **fields
+    )
+
+
+class ParameterValidators:
+    """Compiled parameter models keyed by project id."""
+
+    def __init__(self):
+        self._models: Dict[str, Type[BaseModel]] = {}
+        self._lock = threading.Lock()
+
+    def compile(self, projects: Dict[str, Dict[str, Any]]):
+        """Build the models for all projects up front"""
+        for project_id, project_config in projects.items():
+            self.model(project_id, project_config)
+
+    def model(self, project_id: str, project_config: Dict[str, Any]) -> Type[BaseModel]:
+        model = self._models.get(project_id)
+        if model is None:
+            with self._lock:
+                model = self._models.get(project_id)
+                if model is None:
+                    model = build_model(project_id, project_config.get("parameters", []))
+                    self._models[project_id] = model
+        return model
+
+    def validate(self, project_id: str, project_config: Dict[str, Any],
+                 parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the parameters with defaults applied, or raise ParameterError"""
+        try:
+            validated = self.model(project_id, project_config).model_validate(parameters)
+        except ValidationError as e:
+            raise ParameterError([
+                {"loc": ["parameters", *error["loc"]], "msg": error["msg"], "type": error["type"]}
+                for error in e.errors(include_url=False)
+            ])
+        return validated.model_dump(by_alias=True)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
@@ -0,0 +1,247 @@
+"""
+Pool of pre-started worker processes for CPU-bound project functions.
+
+Each worker is a separate process that receives calls over a pipe and keeps
+its imported project modules between calls. Workers are started ahead of
+time with the configured project modules already imported, and where the
+platform supports it they are forked from a server process that has done the
+heavy imports (PIL, qrcode, ...) once, so neither the first call nor a
+replacement worker pays for a cold interpreter.
+
+A worker that overruns its timeout, or whose call is cancelled, is killed
+and replaced on its own, so its slot frees up straight away and the other
+workers carry on. Workers are also recycled after a number of jobs or once
+their peak memory passes a threshold, and can run under resource limits.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.loader import module_cache
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+# (module_name, module_path) pairs for the fork server to load before forking workers
+PRELOAD_ENV = "TOOLKIT_WORKER_PRELOAD"
+
+
+class WorkerCrashed(Exception):
+    """Raised when a worker process dies while running a call."""
+
+
+def _peak_rss() -> int:
+    """Peak resident memory of this process in bytes, or 0 if unknown"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _apply_limits(memory_limit: int, cpu_limit: int):
+    """Cap this process's address space and CPU time; 0 leaves a limit alone"""
+    if resource is None:
+        return
+    limits = ((resource.RLIMIT_AS, memory_limit), (resource.RLIMIT_CPU, cpu_limit))
+    for which, value in limits:
+        if value > 0:
+            try:
+                resource.setrlimit(which, (value, value))
+            except (ValueError, OSError):
+                pass  # Above the hard limit or unsupported here
+
+
+def _preload(preload: Sequence[Tuple[str, str]]):
+    """Load project modules into the module cache ahead of their first call"""
+    for module_name, module_path in preload:
+        try:
+            module_cache.get_module(module_name, module_path)
+        except Exception:
+            pass  # Reported when the project is actually called
+
+
+def _worker_main(conn, preload: Sequence[Tuple[str, str]], memory_limit: int, cpu_limit: int):
+    """Serve calls from the parent until told to stop"""
+    _apply_limits(memory_limit, cpu_limit)
+
+    # Imported here, as utils.executor imports this module
+    from utils.executor import call_project_function
+
+    # Already loaded when forked from a preloaded fork server
+    _preload(preload)
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        module_name, module_path, function_name, parameters = message
+        try:
+            reply = (True, call_project_function(module_name, module_path, function_name, parameters), _peak_rss())
+        except MemoryError:
+            reply = (False, MemoryError("Project ran out of memory in its worker"), _peak_rss())
+        except Exception as e:
+            reply = (False, e, _peak_rss())
+
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or exception could not be pickled
+            conn.send((False, RuntimeError(f"Could not return result from worker: {e}"), _peak_rss()))
+
+
+def _get_context(preload: Sequence[Tuple[str, str]]):
+    """Prefer a fork server that has loaded the project modules already"""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+    context = multiprocessing.get_context("forkserver")
+    # The fork server imports this module, which loads the modules listed in
+    # PRELOAD_ENV. On Pythons whose fork server honours it, preloading
+    # __main__ also spares each worker from re-running the main script.
+    os.environ[PRELOAD_ENV] = json.dumps(list(preload))
+    context.set_forkserver_preload(["__main__", __name__])
+    return context
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, args: tuple):
+        self.jobs = 0
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,) + args, daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class ProcessWorkerPool:
+    """Fixed number of warm worker processes with per-call timeouts."""
+
+    def __init__(self, size: int, max_jobs: int = 0, max_rss: int = 0,
+                 memory_limit: int = 0, cpu_limit: int = 0):
+        self.size = size
+        # Recycle a worker after max_jobs calls or once its peak RSS passes max_rss bytes
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss
+        # Per-worker RLIMIT_AS in bytes and RLIMIT_CPU in seconds
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.preload: List[Tuple[str, str]] = []
+        self.restarts = 0
+        # Called with the reason whenever a worker is replaced
+        self.on_recycle: Optional[Callable[[str], None]] = None
+        self._context = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+        # Threads that wait on worker pipes so the event loop never blocks
+        self._pipe_threads = ThreadPoolExecutor(max_workers=size, thread_name_prefix="worker-pipe")
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context, (self.preload, self.memory_limit, self.cpu_limit))
+        self._workers.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker, reason: str):
+        self._workers.remove(worker)
+        if reason in ("jobs", "memory"):
+            # Healthy but worn: let it finish exiting on its own
+            worker.stop()
+        else:
+            worker.kill()
+        self.restarts += 1
+        if self.on_recycle is not None:
+            self.on_recycle(reason)
+        self._idle.put_nowait(self._spawn())
+
+    def _start(self):
+        # Started lazily so the queue binds to the running event loop
+        if self._idle is None:
+            if self._context is None:
+                self._context = _get_context(self.preload)
+            self._idle = asyncio.Queue()
+            for _ in range(self.size):
+                self._idle.put_nowait(self._spawn())
+
+    def start(self, preload: Sequence[Tuple[str, str]] = ()):
+        """Start the workers now, importing the (module_name, module_path) pairs in each"""
+        self.preload = list(preload)
+        self._start()
+
+    async def run(self, module_name: str, module_path: str, function_name: str,
+                  parameters: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """Run a project function on an idle worker, killing it if it overruns"""
+        self._start()
+        worker = await self._idle.get()
+        loop = asyncio.get_running_loop()
+        reason = "killed"
+
+        try:
+            worker.conn.send((module_name, module_path, function_name, parameters))
+            ok, value, peak_rss = await asyncio.wait_for(
+                loop.run_in_executor(self._pipe_threads, worker.conn.recv), timeout
+            )
+            worker.jobs += 1
+            if self.max_jobs and worker.jobs >= self.max_jobs:
+                reason = "jobs"
+            elif self.max_rss and peak_rss > self.max_rss:
+                reason = "memory"
+            else:
+                reason = None
+        except asyncio.TimeoutError:
+            # On Python 3.11+ this is the builtin TimeoutError, an OSError subclass
+            raise
+        except (EOFError, OSError):
+            reason = "crashed"
+            raise WorkerCrashed("Worker process exited while running the project")
+        finally:
+            if reason is None:
+                self._idle.put_nowait(worker)
+            else:
+                # Timed out, cancelled, crashed or due for recycling
+                self._replace(worker, reason)
+
+        if ok:
+            return value
+        raise value
+
+    def shutdown(self):
+        """Stop idle workers and kill busy ones"""
+        for worker in list(self._workers):
+            if worker.process.is_alive():
+                worker.stop()
+                worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.kill()
+        self._workers = []
+        self._idle = None
+        self._pipe_threads.shutdown(wait=False)
+
+
+# Only the fork server imports this module with PRELOAD_ENV set; the parent
+# and the workers forked from it already have it imported
+if PRELOAD_ENV in os.environ and multiprocessing.parent_process() is None:
+    _preload(json.loads(os.environ[PRELOAD_ENV]))
@@ -1,12 +1,18 @@
 import os
 import subprocess
+import sys
 import json
 import tempfile
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_file, url_for
+from flask import Flask, Response, render_template, request, jsonify, send_file, url_for
 from werkzeug.utils import secure_filename
 import threading
 import time
+import atexit
+from collections import OrderedDict
+
+from output_stream import MAX_LINE_LENGTH, OutputBuffer, sse_event
+from script_pool import ScriptTimeout, ScriptWorkerPool, WorkerCrashed
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
@@ -17,6 +23,21 @@ UPLOAD_FOLDER = 'uploads'
 OUTPUT_FOLDER = 'outputs'
 SCRIPTS_FOLDER = '../project/backend'  # Path to your Python scripts
 
+# Scripts run in long-lived worker processes that have their imports done
+# already; 0 workers runs every script in a subprocess of its own
+SCRIPT_WORKERS = int(os.environ.get('DASHBOARD_SCRIPT_WORKERS', 2))
+WORKER_MAX_RUNS = int(os.environ.get('DASHBOARD_WORKER_MAX_RUNS', 100))
+SCRIPT_TIMEOUT = 300  # 5 minute timeout
+
+# Lines of output kept per execution for /stream and the final status
+OUTPUT_LINES = int(os.environ.get('DASHBOARD_OUTPUT_LINES', 1000))
+# Seconds between keep-alive comments on an idle output stream
+STREAM_KEEPALIVE = 15
+# Finished executions are forgotten after this many seconds, and beyond the
+# newest FINISHED_EXECUTIONS of them
+RESULT_TTL = int(os.environ.get('DASHBOARD_RESULT_TTL', 3600))
+FINISHED_EXECUTIONS = int(os.environ.get('DASHBOARD_FINISHED_EXECUTIONS', 100))
+
 # Ensure directories exist
 for folder in [UPLOAD_FOLDER, OUTPUT_FOLDER]:
     os.makedirs(folder, exist_ok=True)
@@ -49,6 +70,7 @@ SCRIPT_CATEGORIES = {
         "converter_GUI.py": {
             "name": "File Converter (GUI)",
             "description": "Convert files between different formats",
+            "isolated": True,
             "inputs": [
                 {"name": "input_file", "type": "file", "label": "Input File"},
                 {"name": "output_format", "type": "text", "label": "Output Format"}
@@ -59,6 +81,7 @@ SCRIPT_CATEGORIES = {
         "calculator.py": {
             "name": "Calculator",
             "description": "Perform mathematical calculations",
+            "isolated": True,
             "inputs": [
                 {"name": "expression", "type": "text", "label": "Mathematical Expression", "placeholder": "e.g., 2 + 3 * 4"}
             ]
@@ -66,6 +89,7 @@ SCRIPT_CATEGORIES = {
         "stopwatch.py": {
             "name": "Stopwatch",
             "description": "Precise timing tool with lap recording",
+            "isolated": True,
             "inputs": [
                 {"name": "action", "type": "select", "options": ["start", "lap", "stop"], "label": "Action"}
             ]
@@ -141,6 +165,89 @@ SCRIPT_CATEGORIES = {
 # Store running processes
 running_processes = {}
 
+# Live output of each execution, streamed by /stream/<execution_id>
+output_buffers = {}
+
+# Finished execution ids, oldest first, with the time they finished
+finished_executions = OrderedDict()
+executions_lock = threading.Lock()
+
+def forget_finished():
+    """Drop finished executions past RESULT_TTL or beyond FINISHED_EXECUTIONS"""
+    expired = time.monotonic() - RESULT_TTL
+    with executions_lock:
+        while finished_executions:
+            execution_id, finished_at = next(iter(finished_executions.items()))
+            if finished_at > expired and len(finished_executions) <= FINISHED_EXECUTIONS:
+                break
+            del finished_executions[execution_id]
+            running_processes.pop(execution_id, None)
+            output_buffers.pop(execution_id, None)
+
+def finish_execution(execution_id, status):
+    """Store an execution's final status"""
+    with executions_lock:
+        running_processes[execution_id] = status
+        finished_executions[execution_id] = time.monotonic()
+    forget_finished()
+
+def execution_status(execution_id):
+    """An execution's status, with the output of a completed one read from its buffer"""
+    status = running_processes.get(execution_id)
+    output = output_buffers.get(execution_id)
+    if status is not None and status['status'] == 'completed' and output is not None:
+        status = dict(status, stdout=output.text('stdout'), stderr=output.text('stderr'),
+                      dropped_lines=output.dropped)
+    return status
+
+# GUI scripts need a process of their own, so they are marked "isolated"
+script_pool = None
+if SCRIPT_WORKERS > 0:
+    script_pool = ScriptWorkerPool(
+        SCRIPTS_FOLDER,
+        [name for scripts in SCRIPT_CATEGORIES.values() for name, config in scripts.items() if not config.get('isolated')],
+        SCRIPT_WORKERS,
+        max_runs=WORKER_MAX_RUNS
+    )
+    atexit.register(script_pool.shutdown)
+
+def run_in_subprocess(script_path, args, on_output):
+    """Run a script in a fresh interpreter, passing its output on line by line; returns its exit code"""
+    process = subprocess.Popen(
+        [sys.executable, script_path] + args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors='replace',
+        cwd=SCRIPTS_FOLDER,
+        # Without a terminal Python would only flush its output when the buffer fills
+        env={**os.environ, 'PYTHONUNBUFFERED': '1'}
+    )
+    
+    def pump(pipe, stream):
+        with pipe:
+            for line in iter(lambda: pipe.readline(MAX_LINE_LENGTH), ''):
+                on_output(stream, line)
+    
+    readers = [
+        threading.Thread(target=pump, args=(process.stdout, 'stdout'), daemon=True),
+        threading.Thread(target=pump, args=(process.stderr, 'stderr'), daemon=True)
+    ]
+    for reader in readers:
+        reader.start()
+    
+    try:
+        return_code = process.wait(timeout=SCRIPT_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        for reader in readers:
+            reader.join(timeout=5)
+    return return_code
+
 @app.route('/')
 def index():
     return render_template('index.html', categories=SCRIPT_CATEGORIES)
@@ -164,7 +271,8 @@ def run_script():
         
         # Prepare arguments
         args = []
-        script_path = os.path.join(SCRIPTS_FOLDER, script_name)
+        # Absolute, as scripts run with SCRIPTS_FOLDER as their working directory
+        script_path = os.path.abspath(os.path.join(SCRIPTS_FOLDER, script_name))
         
         # Handle file uploads
         uploaded_files = []
@@ -175,7 +283,7 @@ def run_script():
                     file = request.files[file_key]
                     if file and file.filename:
                         filename = secure_filename(file.filename)
-                        filepath = os.path.join(UPLOAD_FOLDER, f"{execution_id}_{filename}")
+                        filepath = os.path.abspath(os.path.join(UPLOAD_FOLDER, f"{execution_id}_{filename}"))
                         file.save(filepath)
                         uploaded_files.append(filepath)
                         args.append(filepath)
@@ -184,47 +292,54 @@ def run_script():
                 if value:
                     args.append(value)
         
+        # Output is kept in a ring buffer, so a long run holds a bounded amount of it
+        output = OutputBuffer(OUTPUT_LINES)
+        output_buffers[execution_id] = output
+        
         # Execute script in a separate thread
         def execute_script():
             try:
-                # Run the Python script
-                cmd = ['python', script_path] + args
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=300,  # 5 minute timeout
-                    cwd=SCRIPTS_FOLDER
-                )
+                # Only isolated scripts get a process of their own; a worker crash fails the run
+                if script_pool is None or script_config.get('isolated'):
+                    return_code = run_in_subprocess(script_path, args, output.append)
+                else:
+                    return_code = script_pool.run(script_name, args, SCRIPT_TIMEOUT, output.append)
                 
-                # Store results
-                running_processes[execution_id] = {
+                # Store results; the output itself stays in its buffer
+                finish_execution(execution_id, {
                     'status': 'completed',
-                    'stdout': result.stdout,
-                    'stderr': result.stderr,
-                    'return_code': result.returncode,
+                    'return_code': return_code,
                     'timestamp': datetime.now().isoformat()
-                }
-                
-                # Clean up uploaded files
-                for filepath in uploaded_files:
-                    try:
-                        os.remove(filepath)
-                    except:
-                        pass
+                })
                         
-            except subprocess.TimeoutExpired:
-                running_processes[execution_id] = {
+            except WorkerCrashed as e:
+                finish_execution(execution_id, {
+                    'status': 'error',
+                    'error': f"{e}; mark the script \"isolated\" if it ends its own process",
+                    'timestamp': datetime.now().isoformat()
+                })
+            except (subprocess.TimeoutExpired, ScriptTimeout):
+                finish_execution(execution_id, {
                     'status': 'timeout',
                     'error': 'Script execution timed out',
                     'timestamp': datetime.now().isoformat()
-                }
+                })
             except Exception as e:
-                running_processes[execution_id] = {
+                finish_execution(execution_id, {
                     'status': 'error',
                     'error': str(e),
                     'timestamp': datetime.now().isoformat()
-                }
+                })
+            finally:
+                # Clean up uploaded files
+                for filepath in uploaded_files:
+                    try:
+                        os.remove(filepath)
+                    except:
+                        pass
+                
+                # Ends the execution's output stream, now that its status is stored
+                output.close()
         
         # Mark as running
         running_processes[execution_id] = {
@@ -248,11 +363,47 @@ def run_script():
 
 @app.route('/check_status/<execution_id>')
 def check_status(execution_id):
-    if execution_id in running_processes:
-        return jsonify(running_processes[execution_id])
+    forget_finished()
+    status = execution_status(execution_id)
+    if status is not None:
+        return jsonify(status)
     else:
         return jsonify({'error': 'Execution ID not found'}), 404
 
+@app.route('/stream/<execution_id>')
+def stream_output(execution_id):
+    """Server-Sent Events with each line of output, then the final status"""
+    forget_finished()
+    output = output_buffers.get(execution_id)
+    if output is None:
+        return jsonify({'error': 'Execution ID not found'}), 404
+    
+    # Browsers send the id of the last event they saw when they reconnect
+    try:
+        last_seen = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_seen = 0
+    
+    def events(last_seen):
+        while True:
+            lines, dropped, closed = output.read(last_seen, STREAM_KEEPALIVE)
+            if dropped:
+                yield sse_event('dropped', {'lines': dropped})
+            for seq, stream, text in lines:
+                yield sse_event('output', {'stream': stream, 'line': text}, seq)
+                last_seen = seq
+            if closed:
+                yield sse_event('done', execution_status(execution_id) or {})
+                return
+            if not lines:
+                yield ': keep-alive\n\n'
+    
+    return Response(events(last_seen), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies from holding events back
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
@@ -265,4 +416,7 @@ def too_large(e):
     return jsonify({'error': 'File too large'}), 413
 
 if __name__ == '__main__':
+    # Under the debug reloader only the serving child starts workers
+    if script_pool is not None and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        script_pool.start()
     app.run(debug=True, port=5000) 
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Live output of script runs, kept per execution in a bounded ring buffer.
+
+Lines are appended as the script prints them, from whichever thread reads
+its output, and each gets a sequence number. Readers wait for lines after
+the last number they saw, so a Server-Sent Events client that reconnects
+with ``Last-Event-ID`` carries on where it stopped. Only the newest
+``max_lines`` lines are kept, so a long run holds a fixed amount of memory;
+readers that fall behind are told how many lines they missed.
+"""
+
+import json
+import threading
+from collections import deque
+from typing import Any, List, Optional, Tuple
+
+# Longest line kept; longer ones (progress bars without newlines) are split
+MAX_LINE_LENGTH = 4096
+
+
+class OutputBuffer:
+    """The newest lines of one run's stdout and stderr."""
+
+    def __init__(self, max_lines: int):
+        # (sequence number, stream, text), oldest first
+        self._lines: deque = deque(maxlen=max_lines)
+        self._next_seq = 1
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def append(self, stream: str, text: str):
+        with self._condition:
+            self._lines.append((self._next_seq, stream, text))
+            self._next_seq += 1
+            self._condition.notify_all()
+
+    def close(self):
+        """Mark the run as finished, waking up every reader"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def read(self, after: int, timeout: float) -> Tuple[List[Tuple[int, str, str]], int, bool]:
+        """Lines numbered after `after`, waiting up to timeout for the first one
+
+        Returns the lines, how many lines after `after` were already dropped
+        from the buffer, and whether the run has finished.
+        """
+        with self._condition:
+            if self._next_seq - 1 <= after and not self.closed:
+                self._condition.wait(timeout)
+            lines = [line for line in self._lines if line[0] > after]
+            first = lines[0][0] if lines else self._next_seq
+            return lines, max(0, first - after - 1), self.closed
+
+    def text(self, stream: str) -> str:
+        """The buffered output of one stream, as it was printed"""
+        with self._condition:
+            return ''.join(text for _, line_stream, text in self._lines if line_stream == stream)
+
+    @property
+    def dropped(self) -> int:
+        """Lines that have fallen out of the buffer"""
+        with self._condition:
+            return self._next_seq - 1 - len(self._lines)
+
+
+def sse_event(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """One Server-Sent Event, with data encoded as JSON"""
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data)}\n\n"
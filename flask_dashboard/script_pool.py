@@ -0,0 +1,330 @@
+"""
+Pool of long-lived worker processes that run the dashboard's scripts.
+
+Starting ``python script.py`` for every run pays for a fresh interpreter and
+for importing PIL, cv2, pdf2image and friends before the script does any
+work. Each worker here imports what the scripts import once, when it starts,
+and keeps every script compiled. A run executes the script as ``__main__``
+with the given arguments in ``sys.argv``, sending what it prints back to the
+parent a line at a time while it runs. A script
+that defines a top-level ``run(args)`` is imported once instead, and each run
+calls it, using its return value as the exit code.
+
+A worker that overruns its timeout or dies is killed and replaced, and
+workers are recycled after a number of runs, so state a script leaves behind
+does not pile up. Scripts that only work in a process of their own (GUIs,
+anything that calls ``os._exit``) should keep running as subprocesses.
+"""
+
+import ast
+import builtins
+import importlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from output_stream import MAX_LINE_LENGTH
+
+# Called with the stream name ("stdout" or "stderr") and each line of output
+OutputCallback = Callable[[str, str], None]
+
+
+class ScriptTimeout(Exception):
+    """Raised when a script runs past its timeout; its worker is replaced."""
+
+
+class WorkerCrashed(Exception):
+    """Raised when a worker process dies while running a script."""
+
+
+def top_level_imports(tree: ast.Module) -> List[str]:
+    """Absolute modules a script imports outside any function or branch
+
+    For ``from package import name`` both the package and ``package.name``
+    are listed, as the name is often a submodule (``from PIL import Image``).
+    """
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.append(node.module)
+            modules.extend(f"{node.module}.{alias.name}" for alias in node.names if alias.name != '*')
+    return modules
+
+
+def defines_run(tree: ast.Module) -> bool:
+    return any(isinstance(node, ast.FunctionDef) and node.name == 'run' for node in tree.body)
+
+
+def exit_code(code: Any) -> int:
+    """Exit status for a SystemExit code, as the interpreter would report it"""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+class _LineWriter(io.TextIOBase):
+    """File that passes what is written to it on as complete lines."""
+
+    def __init__(self, send: Callable[[Any], None], stream: str):
+        self._send = send
+        self.stream = stream
+        self._pending = ''
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._pending += text
+        while True:
+            newline = self._pending.find('\n')
+            if 0 <= newline < MAX_LINE_LENGTH:
+                end = newline + 1
+            elif len(self._pending) >= MAX_LINE_LENGTH:
+                end = MAX_LINE_LENGTH
+            else:
+                break
+            self._send(('output', self.stream, self._pending[:end]))
+            self._pending = self._pending[end:]
+        return len(text)
+
+    def flush(self):
+        if self._pending:
+            self._send(('output', self.stream, self._pending))
+            self._pending = ''
+
+
+class _ScriptRunner:
+    """Compiled scripts and imported run() functions, inside one worker."""
+
+    def __init__(self, scripts_folder: str):
+        self.scripts_folder = scripts_folder
+        # script name -> (mtime, code object or run function)
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+
+    def load(self, script_name: str) -> Any:
+        """The script's run function or code object, reloaded when the file changes"""
+        path = os.path.join(self.scripts_folder, script_name)
+        mtime = os.stat(path).st_mtime
+        cached = self._entries.get(script_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, 'rb') as f:
+            source = f.read()
+        tree = ast.parse(source, path)
+        if defines_run(tree):
+            module_name = f"dashboard_script_{os.path.splitext(script_name)[0]}"
+            spec = importlib.util.spec_from_file_location(module_name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            entry = module.run
+        else:
+            entry = compile(tree, path, 'exec')
+        self._entries[script_name] = (mtime, entry)
+        return entry
+
+    def preload(self, scripts: Sequence[str]):
+        """Compile the scripts and import their dependencies ahead of the first run"""
+        for script_name in scripts:
+            try:
+                with open(os.path.join(self.scripts_folder, script_name), 'rb') as f:
+                    modules = top_level_imports(ast.parse(f.read()))
+            except Exception:
+                continue  # Reported when the script is actually run
+            for module in modules:
+                try:
+                    importlib.import_module(module)
+                except Exception:
+                    pass  # Not a module, or not installed
+            try:
+                self.load(script_name)
+            except Exception:
+                pass
+
+    def run(self, script_name: str, args: List[str], stdout: io.TextIOBase, stderr: io.TextIOBase) -> int:
+        """Run a script as if started with its arguments, printing to stdout and stderr; returns its exit code"""
+        path = os.path.join(self.scripts_folder, script_name)
+        sys.argv = [path] + list(args)
+        return_code = 0
+
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                entry = self.load(script_name)
+                if callable(entry):
+                    result = entry(list(args))
+                    return_code = result if isinstance(result, int) else 0
+                else:
+                    exec(entry, {'__name__': '__main__', '__file__': path, '__builtins__': builtins})
+            except SystemExit as e:
+                return_code = exit_code(e.code)
+            except Exception as e:
+                # Leave this frame out, so the traceback reads as the interpreter's would
+                traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+                return_code = 1
+            finally:
+                # Undo a chdir made by the script, so the next one starts in the same place
+                os.chdir(self.scripts_folder)
+                stdout.flush()
+                stderr.flush()
+
+        return return_code
+
+
+def _worker_main(conn, scripts_folder: str, scripts: Sequence[str]):
+    """Serve runs from the parent until told to stop"""
+    os.chdir(scripts_folder)
+    sys.path.insert(0, scripts_folder)
+    # Scripts that prompt for input get EOF instead of waiting forever
+    sys.stdin = io.StringIO()
+
+    runner = _ScriptRunner(scripts_folder)
+    runner.preload(scripts)
+    stdout, stderr = _LineWriter(conn.send, 'stdout'), _LineWriter(conn.send, 'stderr')
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        script_name, args = message
+        conn.send(('done', runner.run(script_name, args, stdout, stderr)))
+
+
+def _get_context():
+    """Prefer a fork server, as forking the threaded Flask process is unsafe"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, args: tuple):
+        self.runs = 0
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,) + args, daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class ScriptWorkerPool:
+    """Fixed number of warm worker processes, used from Flask's request threads."""
+
+    def __init__(self, scripts_folder: str, scripts: Sequence[str], size: int, max_runs: int = 0):
+        self.scripts_folder = os.path.abspath(scripts_folder)
+        # Scripts whose dependencies every worker imports when it starts
+        self.scripts = list(scripts)
+        self.size = size
+        # Recycle a worker after this many runs; 0 keeps it for good
+        self.max_runs = max_runs
+        self.restarts = 0
+        # Called with the reason whenever a worker is replaced
+        self.on_recycle: Optional[Callable[[str], None]] = None
+        self._context = None
+        self._idle: Optional[queue.Queue] = None
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context, (self.scripts_folder, self.scripts))
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker, reason: str):
+        with self._lock:
+            self._workers.remove(worker)
+        if reason == 'runs':
+            # Healthy but worn: let it finish exiting on its own
+            worker.stop()
+        else:
+            worker.kill()
+        self.restarts += 1
+        if self.on_recycle is not None:
+            self.on_recycle(reason)
+        self._idle.put(self._spawn())
+
+    def start(self):
+        """Start the workers now rather than on the first run"""
+        with self._lock:
+            if self._idle is not None:
+                return
+            self._context = _get_context()
+            self._idle = queue.Queue()
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def run(self, script_name: str, args: Sequence[str], timeout: Optional[float] = None,
+            on_output: Optional[OutputCallback] = None) -> int:
+        """Run a script on an idle worker, passing its output to on_output as it prints; returns its exit code"""
+        self.start()
+        worker = self._idle.get()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        reason = 'killed'
+
+        try:
+            worker.conn.send((script_name, list(args)))
+            while True:
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                if not worker.conn.poll(remaining):
+                    raise ScriptTimeout(f"{script_name} timed out after {timeout} seconds")
+                message = worker.conn.recv()
+                if message[0] == 'done':
+                    return_code = message[1]
+                    break
+                if on_output is not None:
+                    on_output(message[1], message[2])
+            worker.runs += 1
+            reason = 'runs' if self.max_runs and worker.runs >= self.max_runs else None
+        except (EOFError, OSError):
+            reason = 'crashed'
+            raise WorkerCrashed(f"Worker process exited while running {script_name}")
+        finally:
+            if reason is None:
+                self._idle.put(worker)
+            else:
+                # Timed out, crashed or due for recycling
+                self._replace(worker, reason)
+
+        return return_code
+
+    def shutdown(self):
+        """Stop idle workers and kill busy ones"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._idle = None
+        for worker in workers:
+            if worker.process.is_alive():
+                worker.stop()
+                worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.kill()
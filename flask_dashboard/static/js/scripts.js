@@ -233,8 +233,12 @@ function executeScript(form) {
         if (data.error) {
             showError(resultsDiv, data.error);
         } else {
-            // Start polling for results
-            pollExecutionStatus(data.execution_id, resultsDiv);
+            // Follow the output as it is printed, or poll for the result
+            if (window.EventSource) {
+                streamExecutionOutput(data.execution_id, resultsDiv);
+            } else {
+                pollExecutionStatus(data.execution_id, resultsDiv);
+            }
         }
     })
     .catch(error => {
@@ -258,6 +262,63 @@ function showLoadingState(resultsDiv) {
     `;
 }
 
+function streamExecutionOutput(executionId, resultsDiv) {
+    const source = new EventSource(`/stream/${executionId}`);
+    let outputDiv = null;
+    
+    const appendLine = (text, className) => {
+        if (!outputDiv) {
+            outputDiv = showLiveOutput(resultsDiv);
+        }
+        const atBottom = outputDiv.scrollTop + outputDiv.clientHeight >= outputDiv.scrollHeight - 5;
+        const line = document.createElement('span');
+        line.className = className;
+        line.textContent = text;
+        outputDiv.appendChild(line);
+        if (atBottom) {
+            outputDiv.scrollTop = outputDiv.scrollHeight;
+        }
+    };
+    
+    source.addEventListener('output', event => {
+        const data = JSON.parse(event.data);
+        appendLine(data.line, data.stream === 'stderr' ? 'output-stderr' : '');
+    });
+    
+    source.addEventListener('dropped', event => {
+        const data = JSON.parse(event.data);
+        appendLine(`[${data.lines} earlier lines not shown]\n`, 'output-notice');
+    });
+    
+    source.addEventListener('done', event => {
+        source.close();
+        const data = JSON.parse(event.data);
+        if (data.status === 'completed') {
+            showResults(resultsDiv, data);
+        } else {
+            showError(resultsDiv, data.error || 'Script execution failed');
+        }
+    });
+    
+    source.onerror = () => {
+        // The browser reconnects on its own unless the stream is gone for good
+        if (source.readyState === EventSource.CLOSED) {
+            pollExecutionStatus(executionId, resultsDiv);
+        }
+    };
+}
+
+function showLiveOutput(resultsDiv) {
+    const container = document.createElement('div');
+    container.className = 'output-container';
+    container.innerHTML = `
+        <h6><i class="fas fa-terminal me-2"></i>Live Output:</h6>
+        <div class="output-content"></div>
+    `;
+    resultsDiv.appendChild(container);
+    return container.querySelector('.output-content');
+}
+
 function pollExecutionStatus(executionId, resultsDiv) {
     const pollInterval = setInterval(() => {
         fetch(`/check_status/${executionId}`)
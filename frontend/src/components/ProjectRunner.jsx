@@ -103,9 +103,11 @@ const ProjectRunner = ({ project, isOpen, onClose, onRun }) => {
         );
       
       case 'number':
+      case 'integer':
         return (
           <input
             type="number"
+            step={param.type === 'integer' ? 1 : 'any'}
             value={value}
             onChange={(e) => handleParameterChange(param.name, Number(e.target.value))}
             placeholder={param.description}